@@ -1,4 +1,4 @@
-from flask import request, jsonify, render_template
+from flask import request, jsonify, render_template, make_response
 from curation.components.logger_config import logger
 from curation.components.config import TEST
 from curation.components.factory import create_app, init_services, app_state
@@ -7,6 +7,7 @@ from curation.services.settings_service import SettingsService
 from curation.components.beem import Blockchain
 from curation.utils.vote import VoteManager
 from curation.services.delegator_cache_service import DelegatorCacheService
+import hashlib
 import signal
 import sys
 import os
@@ -39,17 +40,12 @@ def get_post_voters():
         # Determina la blockchain in base all'URL
         platform = 'hive' if 'peakd.com' in post_url or 'hive.blog' in post_url else 'steem'
         
-        # Inizializza l'istanza di blockchain corretta
-        for node_url in blockchain_connector.node_urls.get(platform):
-            if blockchain_connector.ping_server(node_url):
-                if platform == 'steem':
-                    from beem import Steem
-                    blockchain_connector.blockchain = Steem(node=node_url)
-                else:
-                    from beem import Hive
-                    blockchain_connector.blockchain = Hive(node=node_url)
-                break
-        
+        # Inizializza l'istanza di blockchain corretta (client condiviso sul miglior nodo del pool)
+        try:
+            blockchain_connector.blockchain = blockchain_connector.get_client(platform)
+        except Exception as e:
+            logger.error(f"Errore nella connessione al nodo {platform}: {e}")
+
         if blockchain_connector.blockchain is None:
             return jsonify({'error': f'No available {platform} node'}), 503
         
@@ -104,6 +100,11 @@ def get_all_users():
     user_list = [{'username': user.username, 'data': user.data} for user in users]
     return jsonify(user_list)
 
+@app.route('/users/count', methods=['GET'])
+def count_users():
+    """Numero di utenti per piattaforma"""
+    return jsonify(UserService.count_users_by_platform())
+
 @app.route('/users/clear', methods=['POST'])
 def clear_all_users():
     """Elimina tutti gli utenti dal database."""
@@ -126,16 +127,20 @@ def force_refresh_delegators():
         from curation.components.beem import Blockchain
         
         # Pulisci la cache esistente
-        DelegatorCacheService.clear_all()
+        DelegatorCacheService.clear_all('steem')
         
         # Recupera delegatori freschi
         blockchain = Blockchain(app=app)
-        ops = blockchain.get_steem_delegators('steem')
-        DelegatorCacheService.bulk_save_or_update(ops)
+        ops, head_index = blockchain.scan_delegations('steem')
+        counts = DelegatorCacheService.bulk_save_or_update(ops, platform='steem')
+        if head_index is not None:
+            curator = blockchain.get_curator_info('steem')['username']
+            DelegatorCacheService.set_checkpoint('steem', curator, head_index)
         
         return jsonify({
             'success': True, 
-            'message': f'Delegators refreshed successfully. Found {len(ops)} delegators.'
+            'message': f'Delegators refreshed successfully. Found {len(ops)} delegators.',
+            'counts': counts
         })
     except Exception as e:
         logger.error(f"Error forcing delegators refresh: {e}")
@@ -283,9 +288,20 @@ def update_bot_info():
 
 @app.route('/api/delegators/steem', methods=['GET'])
 def get_steem_delegators_api():
-    """Ottiene tutti i delegatori di Steem dal database (aggiornato periodicamente dallo scheduler)"""
-    def get_score(sp, cur_vp):
-        score = (sp / 150000) * 100
+    """Ottiene i delegatori di Steem dal database (aggiornato periodicamente dallo scheduler)
+
+    Parametri opzionali:
+        limit: dimensione della pagina (max 1000); senza limit restituisce tutti i delegatori
+        cursor: valore next_cursor della pagina precedente
+        min_sp / max_sp: intervallo di SP
+        top: alias di limit per i primi N delegatori
+
+    Ordinamento, filtri e paginazione sono applicati da SQLite sull'indice (platform, sp);
+    il punteggio di base è calcolato in scrittura e qui corretto solo per il voting power.
+    La risposta ha un ETag legato all'ultima modifica del feed: se non cambia risponde 304.
+    """
+    def get_score(base_score, cur_vp):
+        score = base_score
         if cur_vp is not None and cur_vp >= 0:
             score = score * cur_vp / 100
         score = min(score, 99)
@@ -293,39 +309,67 @@ def get_steem_delegators_api():
         return round(score, 2)
 
     try:
-        delegators = DelegatorCacheService.get_all_delegators()
-        formatted_delegators = []
-        # Recupera il curatore attuale e il suo voting power
-        from curation.components.beem import Blockchain
-        blockchain = Blockchain()
-        curator_info = blockchain.get_curator_info('steem')
-        curator_username = curator_info.get('username', None)
-        cur_vp = None
-        if curator_username:
+        limit = request.args.get('limit', type=int) or request.args.get('top', type=int)
+        if limit is not None:
+            limit = max(1, min(limit, 1000))
+        min_sp = request.args.get('min_sp', type=float)
+        max_sp = request.args.get('max_sp', type=float)
+        cursor = None
+        raw_cursor = request.args.get('cursor')
+        if raw_cursor:
             try:
-                cur_vp = blockchain.get_account_info(curator_username).get('voting_power', None)
-                if isinstance(cur_vp, str):
-                    cur_vp = float(cur_vp)
-            except Exception:
-                cur_vp = None
-        for op in delegators:
-            sp = float(op.vesting_shares)
-            score = get_score(sp, cur_vp)
-            formatted_delegators.append({
-                'delegator': op.username,
-                'delegatee': 'cur8',
-                'sp_amount': sp,
-                'timestamp': op.timestamp.isoformat() if op.timestamp else None,
-                'vesting_shares': op.vesting_shares,
-                'score': score
-            })
-        formatted_delegators.sort(key=lambda x: x['sp_amount'], reverse=True)
-        return jsonify({
+                cursor_sp, cursor_id = raw_cursor.split(':', 1)
+                cursor = (float(cursor_sp), int(cursor_id))
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor', 'status': 'error'}), 400
+
+        # Curatore e voting power da un'istantanea in cache, senza chiamate RPC a ogni richiesta
+        curator_username = blockchain_connector.get_curator_info('steem').get('username', None)
+        cur_vp = None
+        try:
+            cur_vp = blockchain_connector.get_curator_voting_power('steem')
+        except Exception as e:
+            logger.warning(f"Voting power del curatore non disponibile: {e}")
+        # Arrotondato all'unità: punteggi ed ETag restano stabili tra un punto percentuale e l'altro
+        cur_vp = round(cur_vp) if cur_vp is not None else None
+
+        last_change_seq = DelegatorCacheService.get_last_change_seq('steem')
+        etag = hashlib.sha1(repr((
+            last_change_seq, curator_username, cur_vp, limit, raw_cursor, min_sp, max_sp
+        )).encode()).hexdigest()
+        if etag in request.if_none_match:
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+
+        if limit is None:
+            delegators = DelegatorCacheService.get_all_delegators('steem', min_sp=min_sp, max_sp=max_sp)
+            next_cursor = None
+        else:
+            delegators, next_cursor = DelegatorCacheService.get_delegators_page(
+                'steem', limit=limit, cursor=cursor, min_sp=min_sp, max_sp=max_sp)
+
+        formatted_delegators = [{
+            'delegator': op.username,
+            'delegatee': 'cur8',
+            'sp_amount': op.sp,
+            'timestamp': op.timestamp.isoformat() if op.timestamp else None,
+            'vesting_shares': op.sp,  # Storicamente l'importo in SP: invariato per i client esistenti
+            'vests': op.vests,
+            'score': get_score(op.base_score, cur_vp)
+        } for op in delegators]
+        response = jsonify({
             'delegators': formatted_delegators,
-            'total': len(formatted_delegators),
+            'total': DelegatorCacheService.count_delegators('steem', min_sp, max_sp),
+            'next_cursor': f'{next_cursor[0]!r}:{next_cursor[1]}' if next_cursor else None,
             'curator': curator_username,
+            'curator_vp': cur_vp,
+            'last_change_seq': last_change_seq,
             'status': 'success'
         })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     except Exception as e:
         logger.error(f"Errore nel recupero dei delegatori Steem dal DB: {e}")
         return jsonify({
@@ -333,6 +377,126 @@ def get_steem_delegators_api():
             'status': 'error'
         }), 500
 
+@app.route('/api/nodes/health', methods=['GET'])
+def get_nodes_health():
+    """Restituisce lo stato di salute dei nodi RPC del pool"""
+    return jsonify(blockchain_connector.node_pool.stats())
+
+@app.route('/api/delegators/changes', methods=['GET'])
+def get_delegator_changes():
+    """Restituisce le modifiche ai delegatori successive al numero di sequenza `since`"""
+    try:
+        since = int(request.args.get('since', 0))
+        limit = min(int(request.args.get('limit', 1000)), 5000)
+    except ValueError:
+        return jsonify({'error': 'since and limit must be integers'}), 400
+    try:
+        platform = request.args.get('platform', 'steem')
+        changes = DelegatorCacheService.get_changes_since(since, platform=platform, limit=limit)
+        last_seq = DelegatorCacheService.get_last_change_seq(platform)
+        first_seq = DelegatorCacheService.get_first_change_seq(platform)
+        # Modifiche già eliminate dal feed o sequenza sconosciuta: serve un ricaricamento completo
+        full_resync_required = since > last_seq or (since > 0 and first_seq is not None and since < first_seq - 1)
+        return jsonify({
+            'changes': [change.to_dict() for change in changes],
+            'last_seq': changes[-1].id if changes else last_seq,
+            'has_more': bool(changes) and changes[-1].id < last_seq,
+            'full_resync_required': full_resync_required,
+            'status': 'success'
+        })
+    except Exception as e:
+        logger.error(f"Errore nel recupero delle modifiche dei delegatori: {e}")
+        return jsonify({'error': str(e), 'status': 'error'}), 500
+
+@app.route('/api/rpc/stats', methods=['GET'])
+def get_rpc_stats():
+    """Statistiche del client RPC asincrono condiviso (richieste, errori, richieste in corso per nodo)"""
+    from curation.components.async_rpc import async_rpc
+    return jsonify(async_rpc.stats())
+
+@app.route('/api/delegators/sync-status', methods=['GET'])
+def get_delegators_sync_status():
+    """Restituisce l'avanzamento dell'ultima risincronizzazione completa dei delegatori"""
+    from curation.components.history_ranges import get_scan_progress
+    platform = request.args.get('platform', 'steem')
+    if platform not in ['steem', 'hive']:
+        return jsonify({'error': 'Invalid platform. Must be steem or hive'}), 400
+    return jsonify({'platform': platform, 'progress': get_scan_progress(platform)})
+
+@app.route('/api/chain/params', methods=['GET'])
+def get_chain_params():
+    """Restituisce lo snapshot corrente dei parametri della catena"""
+    from curation.components.chain_params import chain_params
+    platform = request.args.get('platform', 'steem')
+    if platform not in ['steem', 'hive']:
+        return jsonify({'error': 'Invalid platform. Must be steem or hive'}), 400
+    try:
+        return jsonify(chain_params.get(platform).to_dict())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 503
+
+@app.route('/api/cache/accounts', methods=['GET'])
+def get_accounts_cache_stats():
+    """Restituisce le statistiche della cache degli account dei votanti"""
+    from curation.utils.vote import get_account_cache_stats
+    return jsonify(get_account_cache_stats())
+
+@app.route('/api/posts/scan-stats', methods=['GET'])
+def get_posts_scan_stats():
+    """Restituisce la durata dell'ultima scansione dei blog per piattaforma"""
+    return jsonify(blockchain_connector.blog_poller.stats())
+
+@app.route('/api/votes/scheduled', methods=['GET'])
+def get_scheduled_votes():
+    """Restituisce le metriche del VoteScheduler e i voti in attesa"""
+    if not app_state.vote_scheduler:
+        return jsonify({'error': 'Vote scheduler not running'}), 503
+    platform = request.args.get('platform')
+    return jsonify({
+        'stats': app_state.vote_scheduler.stats(),
+        'pending': app_state.vote_scheduler.pending(platform)
+    })
+
+@app.route('/api/votes/plan', methods=['GET'])
+def get_vote_plan():
+    """Restituisce peso, orario e voting power pianificati per i voti in coda"""
+    if not app_state.publisher:
+        return jsonify({'error': 'Publisher not running'}), 503
+    platform = request.args.get('platform', 'steem')
+    if platform not in ['steem', 'hive']:
+        return jsonify({'error': 'Invalid platform. Must be steem or hive'}), 400
+    planner = app_state.publisher.planner
+    return jsonify({
+        'platform': platform,
+        'vp_floor': planner.vp_floor(),
+        'plan': planner.plan(platform)
+    })
+
+@app.route('/api/pipeline/stats', methods=['GET'])
+def get_pipeline_stats():
+    """Restituisce code, throughput e backpressure di ogni stadio della pipeline dei post"""
+    if not app_state.publisher:
+        return jsonify({'error': 'Publisher not running'}), 503
+    return jsonify(app_state.publisher.pipeline_stats())
+
+@app.route('/api/curator/state', methods=['GET'])
+def get_curator_state():
+    """Voting power, ultimo voto e proiezione del ritorno sopra la soglia di voto del curatore"""
+    from curation.components.curator_state import curator_state
+    platform = request.args.get('platform', 'steem')
+    if platform not in ['steem', 'hive']:
+        return jsonify({'error': 'Invalid platform. Must be steem or hive'}), 400
+    state = curator_state.get(platform, blockchain=blockchain_connector)
+    if state is None:
+        return jsonify({'error': 'Curator state not available'}), 503
+    return jsonify(state.to_dict())
+
+@app.route('/api/notifications/stats', methods=['GET'])
+def get_notifications_stats():
+    """Restituisce coda, messaggi uniti, tentativi e invii falliti del dispatcher Telegram"""
+    from curation.utils.telegram import notification_dispatcher
+    return jsonify(notification_dispatcher.stats())
+
 def handle_shutdown(signal, frame):
     """Gestisce l'arresto pulito dell'applicazione"""
     logger.info("Segnale di arresto ricevuto, chiusura dell'applicazione...")
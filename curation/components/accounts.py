@@ -0,0 +1,68 @@
+"""
+Record compatti degli account usati nell'analisi dei votanti:
+contengono solo i campi necessari invece dell'intero oggetto beem Account.
+"""
+import math
+from datetime import datetime, timezone
+
+
+def _vests(value):
+    """Converte '123.456789 VESTS' (o il formato legacy a dizionario) in float"""
+    if isinstance(value, str):
+        return float(value.split(' ')[0])
+    if isinstance(value, dict):
+        return float(value['amount']) / (10 ** value.get('precision', 6))
+    return float(value or 0)
+
+
+def reputation_score(raw_reputation):
+    """Converte la reputazione grezza della catena nel punteggio leggibile (es. 25, 60.5)"""
+    try:
+        raw = int(raw_reputation)
+    except (TypeError, ValueError):
+        return 25.0
+    if raw == 0:
+        return 25.0
+    score = max(math.log10(abs(raw)) - 9, 0)
+    if raw < 0:
+        score = -score
+    return round(score * 9 + 25, 2)
+
+
+class AccountRecord:
+    """Dati essenziali di un account per il calcolo del valore del voto"""
+    __slots__ = ('name', 'vesting_shares', 'received_vesting_shares', 'delegated_vesting_shares',
+                 'reputation', 'voting_power', 'last_vote_time')
+
+    def __init__(self, name, vesting_shares, received_vesting_shares, delegated_vesting_shares,
+                 reputation, voting_power, last_vote_time=None):
+        self.name = name
+        self.vesting_shares = vesting_shares
+        self.received_vesting_shares = received_vesting_shares
+        self.delegated_vesting_shares = delegated_vesting_shares
+        self.reputation = reputation
+        self.voting_power = voting_power
+        self.last_vote_time = last_vote_time
+
+    @classmethod
+    def from_rpc(cls, data):
+        """Crea il record dalla risposta di condenser_api.get_accounts"""
+        last_vote_time = data.get('last_vote_time')
+        if isinstance(last_vote_time, str):
+            last_vote_time = datetime.strptime(last_vote_time, '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
+        return cls(
+            name=data['name'],
+            vesting_shares=_vests(data.get('vesting_shares')),
+            received_vesting_shares=_vests(data.get('received_vesting_shares')),
+            delegated_vesting_shares=_vests(data.get('delegated_vesting_shares')),
+            reputation=reputation_score(data.get('reputation', 0)),
+            voting_power=int(data.get('voting_power', 0) or 0),
+            last_vote_time=last_vote_time
+        )
+
+    @property
+    def effective_vests(self):
+        return self.vesting_shares + self.received_vesting_shares - self.delegated_vesting_shares
+
+    def __repr__(self):
+        return f'<AccountRecord {self.name}>'
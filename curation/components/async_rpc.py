@@ -0,0 +1,163 @@
+"""
+Client JSON-RPC asincrono (aiohttp) per i percorsi più frequenti:
+- Un event loop dedicato in un thread di background, avviato al primo utilizzo.
+- Una sola ClientSession con pool di connessioni keep-alive condiviso dal processo.
+- Un semaforo per nodo limita le richieste contemporanee verso lo stesso endpoint.
+- I nodi sono provati in ordine di salute (node_pool) e ogni esito aggiorna la classifica.
+
+Dal codice sincrono si usa run(coroutine) o call_sync(...); più richieste
+possono essere lanciate insieme con asyncio.gather dentro una coroutine.
+"""
+import asyncio
+import threading
+import time
+import aiohttp
+from .logger_config import logger
+from .node_pool import node_pool
+
+PER_NODE_CONCURRENCY = 16  # Richieste contemporanee massime verso un singolo nodo
+TOTAL_CONNECTIONS = 100
+DEFAULT_TIMEOUT_SECONDS = 10
+ACCOUNTS_CHUNK_SIZE = 500  # Limite di condenser_api.get_accounts per richiesta
+
+
+class RpcError(Exception):
+    pass
+
+
+class AsyncRpcClient:
+    def __init__(self, pool=None, per_node_concurrency=PER_NODE_CONCURRENCY, timeout=DEFAULT_TIMEOUT_SECONDS):
+        self.node_pool = pool or node_pool
+        self.per_node_concurrency = per_node_concurrency
+        self.timeout = timeout
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._semaphores = {}  # node_url -> asyncio.Semaphore
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._in_flight = {}  # node_url -> richieste in corso
+        self.requests = 0
+        self.failures = 0
+
+    # ------------------------------------------------------------------ loop
+    def _ensure_loop(self):
+        if self._loop is not None:
+            return self._loop
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=loop.run_forever, name="AsyncRpcLoop", daemon=True)
+                self._thread.start()
+                self._loop = loop
+                logger.info("Event loop del client RPC asincrono avviato")
+        return self._loop
+
+    def run(self, coro, timeout=None):
+        """Esegue una coroutine sul loop condiviso e ne attende il risultato (da codice sincrono)"""
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        return future.result(timeout)
+
+    def _get_session(self):
+        # Chiamato solo dal thread del loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=TOTAL_CONNECTIONS, limit_per_host=self.per_node_concurrency,
+                                             keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  headers={'Content-Type': 'application/json'})
+        return self._session
+
+    def _semaphore(self, node_url):
+        semaphore = self._semaphores.get(node_url)
+        if semaphore is None:
+            semaphore = self._semaphores[node_url] = asyncio.Semaphore(self.per_node_concurrency)
+        return semaphore
+
+    def _track(self, node_url, delta):
+        with self._stats_lock:
+            self._in_flight[node_url] = self._in_flight.get(node_url, 0) + delta
+            if delta > 0:
+                self.requests += 1
+
+    # ------------------------------------------------------------------ trasporto
+    async def _post(self, platform, payload, timeout=None):
+        """Invia il payload provando i nodi in ordine di salute; restituisce il JSON decodificato"""
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+        last_error = None
+        for node_url in self.node_pool.get_nodes(platform):
+            async with self._semaphore(node_url):
+                start = time.monotonic()
+                self._track(node_url, 1)
+                try:
+                    async with self._get_session().post(node_url, json=payload, timeout=client_timeout) as response:
+                        response.raise_for_status()
+                        body = await response.json(content_type=None)
+                    if isinstance(payload, dict) and 'result' not in body:
+                        raise RpcError(body.get('error', 'RPC response without result'))
+                    if isinstance(payload, list) and not isinstance(body, list):
+                        raise RpcError(f"risposta batch non valida: {body}")
+                    self.node_pool.report_success(platform, node_url, time.monotonic() - start)
+                    return body
+                except Exception as e:
+                    method = payload.get('method') if isinstance(payload, dict) else f"batch[{len(payload)}]"
+                    logger.error(f"Errore nella chiamata {method} sul nodo {node_url}: {e}")
+                    self.node_pool.report_failure(platform, node_url)
+                    with self._stats_lock:
+                        self.failures += 1
+                    last_error = e
+                finally:
+                    self._track(node_url, -1)
+        raise RpcError(f"Nessun nodo {platform} disponibile: {last_error}")
+
+    async def call(self, platform, method, params, timeout=None):
+        body = await self._post(platform, {"jsonrpc": "2.0", "method": method, "params": params, "id": 1}, timeout)
+        return body['result']
+
+    async def call_batch(self, platform, calls, timeout=None):
+        """Esegue [(method, params), ...] in un'unica richiesta JSON-RPC batch.
+
+        Restituisce i risultati nello stesso ordine; le chiamate fallite valgono RpcError.
+        """
+        payload = [{"jsonrpc": "2.0", "method": method, "params": params, "id": index}
+                   for index, (method, params) in enumerate(calls)]
+        body = await self._post(platform, payload, timeout)
+        results = [RpcError('risposta mancante')] * len(calls)
+        for item in body:
+            index = item.get('id')
+            if isinstance(index, int) and 0 <= index < len(calls):
+                results[index] = RpcError(item['error']) if 'error' in item else item.get('result')
+        return results
+
+    def call_sync(self, platform, method, params, timeout=None):
+        return self.run(self.call(platform, method, params, timeout))
+
+    # ------------------------------------------------------------------ API
+    async def get_accounts(self, usernames, platform='steem', chunk_size=ACCOUNTS_CHUNK_SIZE):
+        """Account in blocchi da chunk_size richiesti in parallelo; i blocchi falliti vengono saltati"""
+        usernames = list(dict.fromkeys(usernames))
+        chunks = [usernames[i:i + chunk_size] for i in range(0, len(usernames), chunk_size)]
+        responses = await asyncio.gather(
+            *(self.call(platform, "condenser_api.get_accounts", [chunk], timeout=15) for chunk in chunks),
+            return_exceptions=True
+        )
+        accounts = []
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, Exception):
+                logger.error(f"Errore nel recupero di {len(chunk)} account su {platform}: {response}")
+                continue
+            accounts.extend(response)
+        return accounts
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'running': self._loop is not None,
+                'requests': self.requests,
+                'failures': self.failures,
+                'in_flight': {url: count for url, count in self._in_flight.items() if count},
+                'per_node_concurrency': self.per_node_concurrency
+            }
+
+
+# Istanza condivisa dal processo
+async_rpc = AsyncRpcClient()
@@ -4,22 +4,82 @@ from beem.comment import Comment
 from beem.community import Communities, Community
 import requests
 import json
-import os
-import time
-import pickle
+import hashlib
+import re
+import threading
 import aiohttp
 from .config import node_list
 from .logger_config import logger
-from datetime import datetime, timedelta, timezone
+from .node_pool import node_pool
+from .post_poller import blog_poller
+from .vote_ledger import vote_ledger
+from .chain_params import chain_params
+from .accounts import AccountRecord
+from .history_ranges import HistoryRangeFetcher
+from .async_rpc import async_rpc
+from .curator_state import curator_state
+from datetime import datetime, timezone
 from .instance import published_posts, last_check_time
 from beem.transactionbuilder import TransactionBuilder
 from beembase.operations import Transfer
-from .db import db, Delegator
+from .db import Delegator
 try:
     from ..services.settings_service import SettingsService
 except ImportError:
     SettingsService = None
 
+# Cache dei client beem condivisa da tutte le istanze di Blockchain:
+# chiave (piattaforma, nodo, impronta della chiave di firma o None)
+_client_cache = {}
+_client_cache_lock = threading.Lock()
+
+# Estrae @autore/permlink dai link di steemit, peakd, hive.blog (o da "@autore/permlink")
+_AUTHORPERM_RE = re.compile(r'@([a-z0-9.\-]+)/([^/?#\s]+)')
+
+
+class ResolvedPost:
+    """Post risolto una sola volta e passato lungo la pipeline di voto.
+
+    Autore e permlink vengono estratti dal link senza I/O; il contenuto
+    del post (condenser_api.get_content) viene scaricato al primo accesso
+    e poi riutilizzato. `comment` resta disponibile per le operazioni beem.
+    """
+    __slots__ = ('blockchain', 'platform', 'url', 'author', 'permlink', '_comment', '_content')
+
+    def __init__(self, blockchain, platform, url, author, permlink):
+        self.blockchain = blockchain
+        self.platform = platform
+        self.url = url
+        self.author = author
+        self.permlink = permlink
+        self._comment = None
+        self._content = None
+
+    @property
+    def authorperm(self):
+        return f"@{self.author}/{self.permlink}"
+
+    @property
+    def comment(self):
+        if self._comment is None:
+            self._comment = self.blockchain.get_comment(self.author, self.permlink, self.platform)
+        return self._comment
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = self.blockchain.get_content(self.author, self.permlink, self.platform)
+        return self._content
+
+    @property
+    def created(self):
+        return datetime.strptime(self.content['created'], '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
+
+    @property
+    def active_votes(self):
+        return self.content.get('active_votes') or []
+
+
 class Blockchain:
     def __init__(self, mode='irreversible', app=None):
         self.mode = mode
@@ -27,94 +87,102 @@ class Blockchain:
         self.update_interval = 60
         self.hive_node = ''
         self.node_urls = node_list
+        self.node_pool = node_pool
+        self.blog_poller = blog_poller
+        self.vote_ledger = vote_ledger
+        self.history_fetcher = HistoryRangeFetcher(self)
         self.last_check_time = last_check_time
         
-        # Inizializzazione della cache dei votanti
-        self._voters_cache = {}
-        self._cache_path = os.path.join(os.path.dirname(__file__), "../../instance/voters_cache.pkl")
         # Inizializza la blockchain di riferimento (usata in get_post_voters)
         self.blockchain = None
         self.app = app  # Salva l'app Flask se fornita
-        
-        # Carica la cache esistente se disponibile
-        self._load_cache()
 
-    def ping_server(self, node_url):
-        """Verifica se il nodo è raggiungibile."""
-        try:
-            response = requests.get(node_url, timeout=5)
-            return response.status_code == 200
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error pinging server {node_url}: {e}")
-            return False
+    def _get_node(self, platform):
+        """Restituisce il miglior nodo sano dal pool condiviso, senza ping."""
+        return self.node_pool.get_node(platform)
 
-    def get_steem_profile_info(self, username):  
-        for node_url in self.node_urls.get('steem'):
-            if not self.ping_server(node_url):
-                logger.error(f"Impossibile raggiungere il server: {node_url}")
-                continue  # Prova il nodo successivo
+    def get_client(self, platform, node_url=None, posting_key=None):
+        """Restituisce un client Steem/Hive riutilizzabile per il nodo indicato (o il migliore del pool).
 
-        data = {
-        "jsonrpc": "2.0",
-        "method": "condenser_api.get_accounts",
-        "params": [[username]],
-        "id": 1
-        }
-        response = requests.post(node_url, data=json.dumps(data))
-        if response.status_code == 200:
-            data = response.json()
-            if len(data['result']) > 0:
-                return data
+        I client con chiave di firma sono indicizzati sull'impronta della chiave:
+        quando la chiave viene ruotata in SettingsService si crea un nuovo client
+        e quelli con la chiave precedente vengono scartati.
+        """
+        platform = platform.lower()
+        node_url = node_url or self._get_node(platform)
+        key_id = hashlib.sha256(posting_key.encode()).hexdigest() if posting_key else None
+        cache_key = (platform, node_url, key_id)
+
+        with _client_cache_lock:
+            client = _client_cache.get(cache_key)
+            if client is not None:
+                return client
+
+            client_class = Steem if platform == 'steem' else Hive
+            if posting_key:
+                client = client_class(keys=[posting_key], node=node_url)
+                # Scarta i client firmati con chiavi precedenti della stessa piattaforma
+                for key in list(_client_cache):
+                    if key[0] == platform and key[2] is not None and key[2] != key_id:
+                        del _client_cache[key]
             else:
-                logger.error(f"user not exist: username={username}, node={node_url}, response={data}")
-                raise Exception("user not exist")
+                client = client_class(node=node_url)
+            _client_cache[cache_key] = client
+            logger.info(f"Creato client {platform} per il nodo {node_url}{' (firma)' if posting_key else ''}")
+            return client
+
+    def _rpc_call(self, platform, method, params, timeout=5):
+        """Esegue una chiamata JSON-RPC provando i nodi in ordine di salute.
+
+        La chiamata passa dal client asincrono condiviso (sessione con pool di
+        connessioni e limite di concorrenza per nodo); ogni esito viene riportato
+        al pool, così la classifica dei nodi si aggiorna anche con il traffico reale.
+        """
+        return async_rpc.call_sync(platform, method, params, timeout=timeout)
+
+    def get_content(self, author, permlink, platform='steem'):
+        """Contenuto del post (condenser_api.get_content) come dizionario"""
+        content = self._rpc_call(platform, "condenser_api.get_content", [author, permlink], timeout=10)
+        if not content or not content.get('author'):
+            raise Exception(f"Post non trovato: @{author}/{permlink}")
+        return content
+
+    def get_steem_profile_info(self, username):  
+        result = self._rpc_call('steem', "condenser_api.get_accounts", [[username]])
+        if len(result) > 0:
+            return {'result': result}
         else:
-            raise Exception(response.reason)
+            logger.error(f"user not exist: username={username}, response={result}")
+            raise Exception("user not exist")
             
-    def get_hive_profile_info(self, username):  
-        for node_url in self.node_urls.get('hive'):
-            if not self.ping_server(node_url):
-                logger.error(f"Impossibile raggiungere il server: {node_url}")
-                continue  # Prova il nodo successivo
+    def get_accounts_bulk(self, usernames, platform='steem', chunk_size=500):
+        """Recupera molti account con condenser_api.get_accounts a blocchi.
 
-        data = {
-        "jsonrpc": "2.0",
-        "method": "condenser_api.get_accounts",
-        "params": [[username]],
-        "id": 1
-        }
-        response = requests.post(node_url, data=json.dumps(data))
-        if response.status_code == 200:
-            data = response.json()
-            if len(data['result']) > 0:
-                return data
-            else:
-                raise Exception("user not exist")
+        Returns:
+            dict: {username: AccountRecord} per gli account trovati
+        """
+        # I blocchi vengono richiesti in parallelo sull'event loop del client asincrono
+        records = {}
+        for data in async_rpc.run(async_rpc.get_accounts(usernames, platform, chunk_size)):
+            record = AccountRecord.from_rpc(data)
+            records[record.name] = record
+        return records
+
+    def get_hive_profile_info(self, username):  
+        result = self._rpc_call('hive', "condenser_api.get_accounts", [[username]])
+        if len(result) > 0:
+            return {'result': result}
         else:
-            raise Exception(response.reason)
+            raise Exception("user not exist")
 
     def get_posts(self, usernames, platform, max_age_minutes=5):
         post_links = []
         current_time = datetime.now(timezone.utc)
 
-        for node_url in self.node_urls[platform.lower()]:
-            if not self.ping_server(node_url):
-                logger.error(f"Impossibile raggiungere il server: {node_url}")
-                continue  # Prova il nodo successivo
-
-        headers = {'Content-Type': 'application/json'}
+        blogs = self.blog_poller.fetch_blogs(usernames, platform, limit=1)
 
-        for username in usernames:
-            data = {
-                "jsonrpc": "2.0",
-                "method": "condenser_api.get_discussions_by_blog",
-                "params": [{"tag": username, "limit": 1}],
-                "id": 1
-            }
+        for username, result in blogs.items():
             try:
-                response = requests.post(node_url, headers=headers, data=json.dumps(data), timeout=5)
-                response.raise_for_status()
-                result = response.json().get('result', [])
                 for post in result:
                     link = post.get('url')
                     created_time = post.get('created')
@@ -122,7 +190,6 @@ class Blockchain:
                         post_time = datetime.strptime(created_time, '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
                         post_age = current_time - post_time
                         age_minutes = post_age.total_seconds() / 60
-                        last_check_time = self.last_check_time[username]
 
                         if link in published_posts:
                             continue
@@ -137,22 +204,7 @@ class Blockchain:
         return post_links
     
     def get_dynamic_global_properties(self, platform='steem'):
-        for node_url in self.node_urls.get(platform):
-            if not self.ping_server(node_url):
-                logger.error(f"Server non raggiungibile: {node_url}")
-                continue
-        headers = {'Content-Type': 'application/json'}
-        data = {
-            "jsonrpc": "2.0",
-            "method": "condenser_api.get_dynamic_global_properties",
-            "params": [],
-            "id": 1
-        }
-        response = requests.post(node_url, headers=headers, data=json.dumps(data))
-        if response.ok:
-            return response.json().get('result', {})
-        else:
-            raise Exception(response.reason)
+        return self._rpc_call(platform, "condenser_api.get_dynamic_global_properties", [])
 
     def get_steem_cur8_info(self):
         steem_url = 'https://imridd.eu.pythonanywhere.com/api/steem'
@@ -191,13 +243,9 @@ class Blockchain:
             raise Exception(response.reason)
         
     def get_steem_transaction_cur8(self):
-        for node_url in self.node_urls.get('steem'):
-            if not self.ping_server(node_url):
-                logger.error(f"Impossibile raggiungere il server: {node_url}")
-                continue  # Prova il nodo successivo
-                
+        for node_url in self.node_pool.get_nodes('steem'):
             try:
-                stm = Steem(node=node_url)
+                stm = self.get_client('steem', node_url=node_url)
                 account = Account("cur8", steem_instance=stm)
                 history = account.get_account_history(-1, limit=1000)
                 transactions = []
@@ -228,13 +276,9 @@ class Blockchain:
         return top_transactions
     
     def get_hive_transaction_cur8(self):
-        for node_url in self.node_urls.get('hive'):
-            if not self.ping_server(node_url):
-                logger.error(f"Impossibile raggiungere il server: {node_url}")
-                continue  # Prova il nodo successivo
-                
+        for node_url in self.node_pool.get_nodes('hive'):
             try:
-                hive = Hive(node=node_url)
+                hive = self.get_client('hive', node_url=node_url)
                 account = Account("cur8", steem_instance=hive)
                 history = account.get_account_history(-1, limit=1000)
                 transactions = []
@@ -285,145 +329,116 @@ class Blockchain:
                     raise Exception(response.reason)
                 
 ############################################################################################# Delegators
-    def get_steem_delegators(self, platform='steem', since_time=None):
-        for node_url in self.node_urls.get(platform):
-            if not self.ping_server(node_url):
-                logger.error(f"Server non raggiungibile: {node_url}")
-                continue
+    def scan_delegations(self, platform='steem', start_index=None):
+        """Legge le operazioni delegate_vesting_shares del curatore a partire da un indice.
+
+        La history viene letta in avanti dall'indice start_index fino all'ultima operazione,
+        filtrando per tipo di operazione. Senza start_index (risincronizzazione completa)
+        l'intera history è divisa in intervalli letti in parallelo sui nodi sani.
+
+        Returns:
+            tuple: (operazioni elaborate, una per delegatore; indice dell'ultima operazione letta).
+                   L'indice è None se nessun nodo ha risposto.
+        """
+        curator = self.get_curator_info(platform)['username']
+        head_index = None
+        for node_url in self.node_pool.get_nodes(platform):
             logger.info(f"Trying node: {node_url}")
             try:
-                stm = Steem(node=node_url)
-                curator_info = self.get_curator_info(platform)                
-                acc = Account(curator_info['username'], blockchain_instance=stm)
-
-                virtual_op = acc.virtual_op_count()
-                start_from = virtual_op  # Inizia dall'operazione più recente
-                batch_size = 10000
-                all_delegate_ops = []
-                logger.info("Starting history fetch for delegations...")
-
-                consecutive_old_batches = 0
-                max_consecutive_old_batches = 3  # Massimo 3 batch consecutivi senza operazioni recenti
-                
-                while start_from > 0:
-                    stop_at = max(start_from - batch_size, 0)
-                    logger.info(f"Fetching operations from {start_from} to {stop_at}...")
-                    
-                    batch_found_recent = False
-                    batch_operations = []
-                    
-                    # Raccoglie tutte le operazioni del batch
-                    for h in acc.history_reverse(start=start_from, stop=stop_at, use_block_num=False):
-                        if h['type'] == 'delegate_vesting_shares':
-                            batch_operations.append(h)
-                    
-                    # Processa le operazioni del batch (sono in ordine cronologico crescente)
-                    for op in batch_operations:
-                        if since_time:
-                            op_time = datetime.strptime(op['timestamp'], '%Y-%m-%dT%H:%M:%S')
-                            if op_time > since_time:
-                                # Operazione recente, la includiamo
-                                all_delegate_ops.append(op)
-                                batch_found_recent = True
-                            # Se l'operazione è più vecchia di since_time, la saltiamo
-                        else:
-                            # Se non c'è filtro temporale, include tutte le operazioni
-                            all_delegate_ops.append(op)
-                            batch_found_recent = True
-                    
-                    # Controlla se dobbiamo interrompere la scansione
-                    if since_time:
-                        if batch_found_recent:
-                            consecutive_old_batches = 0  # Reset del contatore
-                        else:
-                            consecutive_old_batches += 1
-                            logger.info(f"Batch senza operazioni recenti: {consecutive_old_batches}/{max_consecutive_old_batches}")
-                            
-                            # Se abbiamo trovato troppi batch consecutivi senza operazioni recenti, fermiamoci
-                            if consecutive_old_batches >= max_consecutive_old_batches:
-                                logger.info("Raggiunti troppi batch consecutivi senza operazioni recenti. Interruzione scansione.")
-                                break
-                        
-                    start_from -= batch_size
-
-                # Ordina per timestamp decrescente
-                all_delegate_ops.sort(key=lambda op: op['timestamp'], reverse=True)
-                # Prendi solo l'ultima operazione per ogni delegator
-                latest_ops = {}
-                for op in all_delegate_ops:
-                    delegator = op['delegator']
-                    if delegator not in latest_ops:
-                        latest_ops[delegator] = op
-
-                min_sp = SettingsService.get_setting('delegation_min_sp')
-                max_sp = SettingsService.get_setting('delegation_max_sp')
-                try:
-                    min_sp = float(min_sp) if min_sp is not None else 0
-                except Exception:
-                    min_sp = 0
-                try:
-                    max_sp = float(max_sp) if max_sp not in (None, '', 'null') else None
-                except Exception:
-                    max_sp = None
-
-                processed_ops = []
-                for op in latest_ops.values():
-                    shares = op['vesting_shares']['amount']
-                    # Converti le shares in float per il confronto
-                    shares_float = float(shares) / (10 ** op['vesting_shares']['precision'])
-                    # Procedi solo se le shares sono maggiori di 0
-                    if shares_float > 0:
-                        converted_sp = stm.vests_to_sp(shares_float)
-                        # FILTRO: solo deleghe tra min_sp e max_sp
-                        if converted_sp < min_sp:
-                            continue
-                        if max_sp is not None and converted_sp > max_sp:
-                            continue
-                        op['converted_sp'] = converted_sp
-                        processed_ops.append(op)
-                return processed_ops
+                stm = self.get_client(platform, node_url=node_url)
+                acc = Account(curator, blockchain_instance=stm)
+
+                head_index = acc.virtual_op_count()
+                if start_index is None:
+                    # Risincronizzazione completa: gli intervalli sono letti una sola volta qui sotto
+                    break
+                if start_index > head_index:
+                    return [], head_index
+                logger.info(f"Lettura deleghe di {acc.name} dall'operazione {start_index} a {head_index}...")
+                delegate_ops = list(acc.history(start=start_index, stop=head_index, use_block_num=False,
+                                                only_ops=['delegate_vesting_shares']))
+                logger.info(f"Trovate {len(delegate_ops)} operazioni di delega")
+                return self._process_delegation_ops(delegate_ops, platform), head_index
 
             except Exception as e:
                 logger.error(f"Error fetching delegators from node {node_url}: {e}")
+                self.node_pool.report_failure(platform, node_url)
                 continue
 
-        logger.error("All nodes failed. Unable to fetch delegators.")
-        return []
+        if head_index is None or start_index is not None:
+            logger.error("All nodes failed. Unable to fetch delegators.")
+            return [], None
+
+        # Il fetcher gestisce da sé il failover dei nodi per ogni intervallo
+        try:
+            delegate_ops = self.history_fetcher.fetch(platform, curator, 0, head_index,
+                                                      only_ops=['delegate_vesting_shares'])
+        except Exception as e:
+            logger.error(f"Unable to fetch delegators: {e}")
+            return [], None
+        logger.info(f"Trovate {len(delegate_ops)} operazioni di delega")
+        return self._process_delegation_ops(delegate_ops, platform), head_index
+
+    def get_steem_delegators(self, platform='steem'):
+        """Scansione completa: ultima operazione di delega per ogni delegatore attivo"""
+        ops, _ = self.scan_delegations(platform)
+        return [op for op in ops if not op.get('removed')]
+
+    def _process_delegation_ops(self, delegate_ops, platform):
+        """Tiene l'operazione più recente per delegatore, filtra e converte VESTS -> SP
+
+        Le deleghe annullate (0 VESTS) o fuori dall'intervallo min/max SP non vengono scartate:
+        sono restituite con op['removed'] = True, così chi sincronizza può eliminarle.
+        """
+        # L'indice della history è crescente: l'ultima operazione vista è la più recente
+        latest_ops = {}
+        for op in sorted(delegate_ops, key=lambda op: op.get('index', 0)):
+            latest_ops[op['delegator']] = op
 
-    def process_delegation_changes(self, operations):
+        min_sp = SettingsService.get_setting('delegation_min_sp')
+        max_sp = SettingsService.get_setting('delegation_max_sp')
+        try:
+            min_sp = float(min_sp) if min_sp is not None else 0
+        except Exception:
+            min_sp = 0
+        try:
+            max_sp = float(max_sp) if max_sp not in (None, '', 'null') else None
+        except Exception:
+            max_sp = None
+
+        # Conversione VESTS -> SP con lo snapshot condiviso dei parametri della catena
+        snapshot = chain_params.get(platform)
+        processed_ops = []
+        for op in latest_ops.values():
+            shares = op['vesting_shares']['amount']
+            # Converti le shares in float per il confronto
+            shares_float = float(shares) / (10 ** op['vesting_shares']['precision'])
+            converted_sp = snapshot.vests_to_sp(shares_float) if shares_float > 0 else 0
+            op['vests'] = shares_float
+            op['converted_sp'] = converted_sp
+            # FILTRO: solo deleghe attive tra min_sp e max_sp
+            op['removed'] = (shares_float <= 0 or converted_sp < min_sp
+                             or (max_sp is not None and converted_sp > max_sp))
+            processed_ops.append(op)
+        return processed_ops
+
+    def process_delegation_changes(self, operations, platform='steem'):
+        """Classifica le operazioni elaborate (con converted_sp) in nuove deleghe o modifiche"""
         changes = []
         for op in operations:
-            delegator = op['delegator']
-            amount = op['vesting_shares']
-            entry = Delegator.query.filter_by(username=delegator).first()
+            entry = Delegator.query.filter_by(platform=platform, username=op['delegator']).first()
 
             # Controlla se è una nuova delegazione o una modifica
             if not entry:
                 changes.append({'type': 'new', 'data': op})
-            elif entry.vesting_shares != amount:
+            elif entry.sp != op['converted_sp']:
                 changes.append({'type': 'update', 'data': op})
         
         return changes
 
-    def save_delegation_changes(self, changes):
-        for change in changes:
-            op = change['data']
-            delegator = op['delegator']
-            entry = Delegator.query.filter_by(username=delegator).first()
-
-            if change['type'] == 'new':
-                new_entry = Delegator(
-                    username=delegator,
-                    vesting_shares=op['vesting_shares']['amount'],
-                    last_operation_id=op['_id'],
-                    timestamp=datetime.strptime(op['timestamp'], '%Y-%m-%dT%H:%M:%S')
-                )
-                db.session.add(new_entry)
-            else:
-                entry.vesting_shares = op['vesting_shares']
-                entry.last_operation_id = op['_id']
-
-        db.session.commit()
+    def save_delegation_changes(self, changes, platform='steem'):
+        from ..services.delegator_cache_service import DelegatorCacheService
+        return DelegatorCacheService.bulk_save_or_update([change['data'] for change in changes], platform=platform)
 
     def send_confirmation(self, changes, stm):
         for change in changes:
@@ -476,72 +491,45 @@ class Blockchain:
     ##########################################################################################
     
     def like_steem_post(self, voter, voted, private_posting_key, permlink, weight=20):
-        for node_url in self.node_urls.get('steem'):
-            if not self.ping_server(node_url):
-                logger.error(f"Impossibile raggiungere il server: {node_url}")
-                continue  # Prova il nodo successivo
-        steem = Steem(keys=[private_posting_key], node=node_url, rpcuser=voter) 
+        steem = self.get_client('steem', posting_key=private_posting_key)
         account = Account(voter, blockchain_instance=steem)
         comment = Comment(authorperm=f"@{voted}/{permlink}", blockchain_instance=steem)
         comment.vote(weight, account=account)
 
     def like_hive_post(self, voter, voted, private_posting_key, permlink, weight=20):   
-        for node_url in self.node_urls.get('hive'):
-            if not self.ping_server(node_url):
-                logger.error(f"Impossibile raggiungere il server: {node_url}")
-                continue  # Prova il nodo successivo
-        hive = Hive(keys=[private_posting_key], node=node_url, rpcuser=voter)
+        hive = self.get_client('hive', posting_key=private_posting_key)
         account = Account(voter, blockchain_instance=hive)
         comment = Comment(authorperm=f"@{voted}/{permlink}", blockchain_instance=hive)
         comment.vote(weight, account=account)
 
+    @staticmethod
+    def parse_post_url(post_url):
+        """Estrae (autore, permlink) da un link steemit/peakd/hive.blog senza chiamate di rete."""
+        match = _AUTHORPERM_RE.search(post_url or '')
+        if not match:
+            raise ValueError(f"Link del post non valido: {post_url}")
+        return match.group(1), match.group(2)
+
+    def resolve_post(self, post_url, platform):
+        """Risolve il post una sola volta; il contenuto viene scaricato al primo utilizzo."""
+        author, permlink = self.parse_post_url(post_url)
+        return ResolvedPost(self, platform, post_url, author, permlink)
+
     def get_steem_permlink(self, post_url):
-        for node_url in self.node_urls.get('steem'):
-            if not self.ping_server(node_url):
-                logger.error(f"Impossibile raggiungere il server: {node_url}")
-                continue  # Prova il nodo successivo
-        steem = Steem(node=node_url) 
-        comment = Comment(post_url, blockchain_instance=steem)
-        permlink = comment.permlink
-        return permlink
+        return self.parse_post_url(post_url)[1]
     
     def get_steem_author(self, post_url):
-        for node_url in self.node_urls.get('steem'):
-            if not self.ping_server(node_url):
-                logger.error(f"Impossibile raggiungere il server: {node_url}")
-                continue  # Prova il nodo successivo
-        steem = Steem(node=node_url) 
-        comment = Comment(post_url, blockchain_instance=steem)
-        author = comment.author
-        return author
+        return self.parse_post_url(post_url)[0]
     
     def get_hive_permlink(self, post_url):
-        for node_url in self.node_urls.get('hive'):
-            if not self.ping_server(node_url):
-                logger.error(f"Impossibile raggiungere il server: {node_url}")
-                continue  # Prova il nodo successivo
-        hive = Hive(node=node_url)
-        comment = Comment(post_url, blockchain_instance=hive)
-        permlink = comment.permlink
-        return permlink
+        return self.parse_post_url(post_url)[1]
     
     def get_hive_author(self, post_url):
-        for node_url in self.node_urls.get('hive'):
-            if not self.ping_server(node_url):
-                logger.error(f"Impossibile raggiungere il server: {node_url}")
-                continue  # Prova il nodo successivo
-        hive = Hive(node=node_url)
-        comment = Comment(post_url, blockchain_instance=hive)
-        author = comment.author
-        return author
+        return self.parse_post_url(post_url)[0]
     
     def get_user_last_post(self, username):
-        for node_url in self.node_urls.get('steem'):
-            if not self.ping_server(node_url):
-                logger.error(f"Impossibile raggiungere il server: {node_url}")
-                continue  # Prova il nodo successivo
-            
-            steem = Steem(node=node_url)
+        for node_url in self.node_pool.get_nodes('steem'):
+            steem = self.get_client('steem', node_url=node_url)
             try:
                 account = Account(username, blockchain_instance=steem)
                 result = account.get_blog(start_entry_id=0, limit=1, raw_data=False, short_entries=False, account=None)
@@ -552,12 +540,8 @@ class Blockchain:
         raise Exception("Nessun nodo Steem disponibile")
     
     def get_user_last_hive_post(self, username):
-        for node_url in self.node_urls.get('hive'):
-            if not self.ping_server(node_url):
-                logger.error(f"Impossibile raggiungere il server: {node_url}")
-                continue  # Prova il nodo successivo
-            
-            hive = Hive(node=node_url)
+        for node_url in self.node_pool.get_nodes('hive'):
+            hive = self.get_client('hive', node_url=node_url)
             try:
                 account = Account(username, blockchain_instance=hive)
                 result = account.get_blog(start_entry_id=0, limit=1, raw_data=False, short_entries=False, account=None)
@@ -568,14 +552,7 @@ class Blockchain:
         raise Exception("Nessun nodo Hive disponibile")
     
     def get_comment(self, author, permalink, blockchain: str):
-        for node_url in self.node_urls.get(blockchain):
-            if not self.ping_server(node_url):
-                logger.error(f"Impossibile raggiungere il server: {node_url}")
-                continue  # Prova il nodo successivo
-        if blockchain == 'steem':
-            instance = Steem(node=node_url)
-        else:
-            instance = Hive(node=node_url)
+        instance = self.get_client(blockchain)
         comment = Comment(f"@{author}/{permalink}", blockchain_instance=instance)
         return comment
     
@@ -587,157 +564,74 @@ class Blockchain:
         current_vp = min(voting_power + regenerated_vp, 100)
         return current_vp
     
+    def get_curator_voting_power(self, platform='steem'):
+        """Voting power attuale del curatore in percentuale (0-100).
+
+        Lo stato del curatore è tenuto in memoria da curator_state e riletto dalla catena
+        solo dopo i voti o periodicamente; la rigenerazione è calcolata localmente.
+        Restituisce None se il curatore non è configurato o l'account non è disponibile.
+        """
+        return curator_state.voting_power(platform, blockchain=self)
+
     def get_account_info(self, username):
-        for node_url in self.node_urls.get('steem'):
-            if not self.ping_server(node_url):
-                logger.error(f"Impossibile raggiungere il server: {node_url}")
-                continue
-        steem = Steem(node=node_url)
+        steem = self.get_client('steem')
         account = Account(username, blockchain_instance=steem)
         return account
     
-    def get_reward_fund(self, fund_name="post"):
-        for node_url in self.node_urls.get('steem'):
-            if not self.ping_server(node_url):
-                logger.error(f"Impossibile raggiungere il server: {node_url}")
-                continue
+    def get_reward_fund(self, fund_name="post", platform='steem'):
         """Get reward fund information directly from the blockchain.
         
         Args:
             fund_name (str): Name of the reward fund, typically "post"
+            platform (str): 'steem' o 'hive'
             
         Returns:
             dict: Reward fund data with relevant information
         """
         try:
-            headers = {'Content-Type': 'application/json'}
-            payload = {
-                "jsonrpc": "2.0",
-                "method": "condenser_api.get_reward_fund",
-                "params": [fund_name],
-                "id": 1
-            }
-            
-            response = requests.post(node_url, json=payload, headers=headers, timeout=5)
-            
-            if response.status_code == 200:
-                result = response.json()
-                if 'result' in result:
-                    # Convert amounts to a more usable format
-                    reward_data = result['result']
-                    return reward_data
-                    
-            logger.warning(f"Failed to get reward fund data from {node_url}")
-            # self.switch_to_backup_node()
-            return self.get_reward_fund(fund_name)  # Try again with new node
-            
+            return self._rpc_call(platform, "condenser_api.get_reward_fund", [fund_name])
         except Exception as e:
             logger.error(f"Error getting reward fund: {str(e)}")
-            # self.switch_to_backup_node()
-            return self.get_reward_fund(fund_name)  # Try again with new node
+            raise
     
-    def get_current_median_history_price(self):
-        for node_url in self.node_urls.get('steem'):
-            if not self.ping_server(node_url):
-                logger.error(f"Impossibile raggiungere il server: {node_url}")
-                continue
+    def get_current_median_history_price(self, platform='steem'):
         """Get the current median price history from the blockchain.
         
         Returns:
             dict: Price data with base and quote values
         """
         try:
-            headers = {'Content-Type': 'application/json'}
-            payload = {
-                "jsonrpc": "2.0",
-                "method": "condenser_api.get_current_median_history_price",
-                "params": [],
-                "id": 1
-            }
+            price_data = self._rpc_call(platform, "condenser_api.get_current_median_history_price", [])
             
-            response = requests.post(node_url, json=payload, headers=headers, timeout=5)
-            
-            if response.status_code == 200:
-                result = response.json()
-                if 'result' in result:
-                    # Parse price data into a usable format
-                    price_data = result['result']
-                    
-                    # Convert price strings to structured data
-                    base_parts = price_data['base'].split(' ')
-                    quote_parts = price_data['quote'].split(' ')
-                    
-                    return {
-                        'base': {
-                            'amount': float(base_parts[0]),
-                            'symbol': base_parts[1]
-                        },
-                        'quote': {
-                            'amount': float(quote_parts[0]),
-                            'symbol': quote_parts[1]
-                        }
-                    }
-                    
-            logger.warning(f"Failed to get price data from {node_url}")
-            # self.switch_to_backup_node()
-            return self.get_current_median_history_price()  # Try again with new node
+            # Convert price strings to structured data
+            base_parts = price_data['base'].split(' ')
+            quote_parts = price_data['quote'].split(' ')
             
+            return {
+                'base': {
+                    'amount': float(base_parts[0]),
+                    'symbol': base_parts[1]
+                },
+                'quote': {
+                    'amount': float(quote_parts[0]),
+                    'symbol': quote_parts[1]
+                }
+            }
         except Exception as e:
             logger.error(f"Error getting current median history price: {str(e)}")
-            # self.switch_to_backup_node()
-            return self.get_current_median_history_price()  # Try again with new node
+            raise
         
 
-    def _load_cache(self):
-        """Carica la cache dei votanti dal file se esiste."""
-        try:
-            if os.path.exists(self._cache_path):
-                with open(self._cache_path, 'rb') as f:
-                    cached_data = pickle.load(f)
-                    # Verifica che la cache non sia vecchia (più di 7 giorni)
-                    if 'timestamp' in cached_data and (datetime.now() - cached_data['timestamp']).days < 7:
-                        self._voters_cache = cached_data.get('voters', {})
-                        logger.info(f"Caricati {len(self._voters_cache)} record dalla cache dei votanti")
-                    else:
-                        logger.info("Cache dei votanti scaduta, verrà rigenerata")
-        except Exception as e:
-            logger.warning(f"Errore nel caricamento della cache dei votanti: {e}")
-            self._voters_cache = {}
-    
-    def _save_cache(self):
-        """Salva la cache dei votanti su file."""
-        try:
-            # Assicurati che la directory esista
-            os.makedirs(os.path.dirname(self._cache_path), exist_ok=True)
-            
-            cache_data = {
-                'timestamp': datetime.now(),
-                'voters': self._voters_cache
-            }
-            
-            with open(self._cache_path, 'wb') as f:
-                pickle.dump(cache_data, f)
-            logger.info(f"Salvati {len(self._voters_cache)} record nella cache dei votanti")
-        except Exception as e:
-            logger.warning(f"Errore nel salvataggio della cache dei votanti: {e}")
-
     def get_platform_and_instance(self, post_url):
         """
         Determina la piattaforma ('steem' o 'hive') e restituisce l'istanza blockchain corretta.
         """
         if 'peakd.com' in post_url or 'hive.blog' in post_url:
             platform = 'hive'
-            for node_url in self.node_urls.get('hive', []):
-                if self.ping_server(node_url):
-                    from beem import Hive
-                    return platform, Hive(node=node_url)
+            return platform, self.get_client(platform)
         else:
             platform = 'steem'
-            for node_url in self.node_urls.get('steem', []):
-                if self.ping_server(node_url):
-                    from beem import Steem
-                    return platform, Steem(node=node_url)
-        raise Exception("No available node for platform")
+            return platform, self.get_client(platform)
 
     def get_previous_author_posts(self, author, platform, limit=1):
         """
@@ -754,32 +648,12 @@ class Blockchain:
         try:
             logger.info(f"Recupero dei {limit} post precedenti di @{author} su {platform}")
             
-            # Trova il nodo disponibile
-            node_urls = self.node_urls.get(platform.lower(), [])
-            node_url = None
-            
-            for url in node_urls:
-                if self.ping_server(url):
-                    node_url = url
-                    break
-            
-            if not node_url:
-                logger.error(f"Nessun nodo {platform} disponibile")
-                return []
-            
-            # Prepara la richiesta API
-            headers = {'Content-Type': 'application/json'}
-            data = {
-                "jsonrpc": "2.0",
-                "method": "condenser_api.get_discussions_by_blog",
-                "params": [{"tag": author, "limit": limit+1}],  # +1 per escludere il post attuale
-                "id": 1
-            }
-            
-            response = requests.post(node_url, headers=headers, data=json.dumps(data), timeout=10)
-            response.raise_for_status()
-            
-            posts = response.json().get('result', [])
+            posts = self._rpc_call(
+                platform.lower(),
+                "condenser_api.get_discussions_by_blog",
+                [{"tag": author, "limit": limit+1}],  # +1 per escludere il post attuale
+                timeout=10
+            )
             # Filtra solo i post dell'autore (esclude reblog) e salta il primo (post attuale)
             author_posts = [post for post in posts if post.get('author') == author][1:limit+1]
             
@@ -823,65 +697,11 @@ class Blockchain:
     def get_votes_today(self, curator, author, platform):
         """
         Conta quanti voti il curatore ha dato all'autore nelle ultime 24 ore.
-        Usa history_reverse per efficienza: si ferma appena trova una operazione troppo vecchia.
+        Usa il registro incrementale dei voti: la history viene letta solo
+        a partire dall'ultimo indice già elaborato.
         """
         try:
-            cache_key = f"{curator}_{author}_{platform}_votes_today"
-            now = datetime.now()
-            if hasattr(self, '_local_cache') and cache_key in self._local_cache:
-                cached = self._local_cache[cache_key]
-                if (now - cached['timestamp']).seconds < 180:
-                    return cached['count']
-            else:
-                if not hasattr(self, '_local_cache'):
-                    self._local_cache = {}
-            # Scegli la blockchain corretta
-            if platform == "steem":
-                for node_url in self.node_urls.get('steem'):
-                    if self.ping_server(node_url):
-                        stm = Steem(node=node_url)
-                        break
-                else:
-                    logger.error("Nessun nodo Steem disponibile")
-                    return 0
-                account = Account(curator, blockchain_instance=stm)
-            else:
-                for node_url in self.node_urls.get('hive'):
-                    if self.ping_server(node_url):
-                        hive = Hive(node=node_url)
-                        break
-                else:
-                    logger.error("Nessun nodo Hive disponibile")
-                    return 0
-                account = Account(curator, blockchain_instance=hive)
-            since = datetime.now(timezone.utc) - timedelta(days=1)
-            votes = 0
-            virtual_op = account.virtual_op_count()
-            batch_size = 500
-            start_from = virtual_op
-            stop = 0
-            for op in account.history_reverse(start=start_from, stop=stop, use_block_num=False):
-                if op['type'] == 'vote' and op.get('author') == author:
-                    vote_time = op.get('timestamp')
-                    if vote_time is None:
-                        continue
-                    if isinstance(vote_time, str):
-                        try:
-                            vote_time = datetime.strptime(vote_time, '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
-                        except ValueError:
-                            try:
-                                vote_time = datetime.fromisoformat(vote_time.replace('Z', '+00:00'))
-                            except Exception:
-                                continue
-                    if vote_time.tzinfo is None:
-                        vote_time = vote_time.replace(tzinfo=timezone.utc)
-                    if vote_time > since:
-                        votes += 1
-                    else:
-                        # Appena trovi una operazione troppo vecchia, puoi fermarti
-                        break
-            self._local_cache[cache_key] = {'timestamp': now, 'count': votes}
-            return votes
+            return vote_ledger.count_votes(self, curator, author, platform)
         except Exception as e:
             logger.error(f"Errore in get_votes_today: {e}")
-            return 0
\ No newline at end of file
+            return 0
@@ -0,0 +1,118 @@
+"""
+Rilevamento dei nuovi post seguendo i blocchi della catena:
+- Legge i blocchi in sequenza con condenser_api.get_ops_in_block.
+- Filtra le operazioni 'comment' senza parent_author (post, non commenti)
+  confrontando l'autore con l'insieme in memoria degli utenti curati.
+- Il costo per blocco è costante, indipendente dal numero di utenti seguiti.
+- Riprende dall'ultimo blocco elaborato, salvato nelle impostazioni.
+"""
+import time
+from datetime import datetime, timezone
+from .logger_config import logger
+from .instance import published_posts
+try:
+    from ..services.settings_service import SettingsService
+except ImportError:
+    SettingsService = None
+
+MAX_BLOCKS_PER_CYCLE = 200  # Blocchi massimi elaborati per ogni chiamata
+MAX_CATCHUP_BLOCKS = 1200  # Oltre questo ritardo si riparte vicino alla testa (~1 ora)
+PERSIST_INTERVAL_SECONDS = 30
+
+
+class BlockStreamWatcher:
+    """Segue i blocchi di una piattaforma e restituisce i link dei nuovi post degli utenti curati"""
+
+    def __init__(self, blockchain, platform, max_age_minutes=5,
+                 max_blocks_per_cycle=MAX_BLOCKS_PER_CYCLE, max_catchup_blocks=MAX_CATCHUP_BLOCKS):
+        self.blockchain = blockchain
+        self.platform = platform
+        self.max_age_minutes = max_age_minutes
+        self.max_blocks_per_cycle = max_blocks_per_cycle
+        self.max_catchup_blocks = max_catchup_blocks
+        self.last_block = None
+        self._last_persist = 0
+        self._setting_key = f'{platform}_stream_last_block'
+
+    def _load_last_block(self):
+        if not SettingsService:
+            return None
+        value = SettingsService.get_setting(self._setting_key, platform=self.platform, app=self.blockchain.app)
+        try:
+            return int(value) if value else None
+        except (TypeError, ValueError):
+            return None
+
+    def _persist_last_block(self, force=False):
+        if not SettingsService or self.last_block is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_persist < PERSIST_INTERVAL_SECONDS:
+            return
+        SettingsService.set_setting(self._setting_key, str(self.last_block), platform=self.platform,
+                                    app=self.blockchain.app)
+        self._last_persist = now
+
+    def _get_head_block(self):
+        props = self.blockchain.get_dynamic_global_properties(self.platform)
+        if self.blockchain.mode == 'irreversible':
+            return int(props['last_irreversible_block_num'])
+        return int(props['head_block_number'])
+
+    @staticmethod
+    def _parse_op(entry):
+        """Restituisce (tipo, dati) per le operazioni in formato legacy o appbase"""
+        op = entry.get('op')
+        if isinstance(op, (list, tuple)) and len(op) == 2:
+            return op[0], op[1]
+        if isinstance(op, dict):
+            return op.get('type', '').replace('_operation', ''), op.get('value', {})
+        return None, None
+
+    def _is_new_post(self, author, permlink):
+        """Scarta le modifiche a post già esistenti verificando la data di creazione"""
+        try:
+            content = self.blockchain._rpc_call(self.platform, "condenser_api.get_content", [author, permlink])
+            created = datetime.strptime(content['created'], '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
+            age_minutes = (datetime.now(timezone.utc) - created).total_seconds() / 60
+            return age_minutes <= self.max_age_minutes
+        except Exception as e:
+            logger.error(f"Errore nella verifica del post @{author}/{permlink} su {self.platform}: {e}")
+            return False
+
+    def fetch_new_posts(self, usernames):
+        """Elabora i blocchi nuovi e restituisce i link (/categoria/@autore/permlink) dei nuovi post"""
+        tracked = set(usernames)
+        post_links = []
+        head = self._get_head_block()
+
+        if self.last_block is None:
+            self.last_block = self._load_last_block() or head - 1
+            logger.info(f"[{self.platform}] Stream dei blocchi avviato dal blocco {self.last_block + 1}")
+
+        if head - self.last_block > self.max_catchup_blocks:
+            logger.warning(f"[{self.platform}] Stream indietro di {head - self.last_block} blocchi, "
+                           f"ripartenza dal blocco {head - self.max_catchup_blocks}")
+            self.last_block = head - self.max_catchup_blocks
+
+        target = min(head, self.last_block + self.max_blocks_per_cycle)
+        while self.last_block < target:
+            block_num = self.last_block + 1
+            ops = self.blockchain._rpc_call(self.platform, "condenser_api.get_ops_in_block", [block_num, False])
+            for entry in ops:
+                op_type, data = self._parse_op(entry)
+                if op_type != 'comment' or data.get('parent_author'):
+                    continue
+                author = data.get('author')
+                if author not in tracked:
+                    continue
+                link = f"/{data.get('parent_permlink')}/@{author}/{data.get('permlink')}"
+                if link in published_posts:
+                    continue
+                if self._is_new_post(author, data.get('permlink')):
+                    post_links.append(link)
+                    published_posts.add(link)
+            self.last_block = block_num
+
+        self._persist_last_block()
+        return post_links
@@ -0,0 +1,135 @@
+"""
+Snapshot dei parametri globali della catena usati nel calcolo del valore dei voti:
+- Proprietà globali (rapporto SP/VESTS), reward fund "post" e prezzo mediano.
+- Le tre chiamate vengono inviate in un'unica richiesta JSON-RPC batch tramite il
+  client asincrono condiviso (async_rpc), con la stessa scelta dei nodi.
+- Lo snapshot vale per pochi blocchi (TTL) e viene aggiornato in background,
+  ed è condiviso da VoteManager, API dei delegatori e sniper.
+"""
+import threading
+import time
+from .logger_config import logger
+from .async_rpc import async_rpc
+
+BLOCK_INTERVAL_SECONDS = 3
+SNAPSHOT_TTL_SECONDS = 3 * BLOCK_INTERVAL_SECONDS  # Validità di uno snapshot: 3 blocchi
+MAX_STALE_SECONDS = 60  # Oltre questa età lo snapshot viene aggiornato in modo sincrono
+
+
+def _amount(value):
+    """Converte '123.456 STEEM' o {'amount': ...} in float"""
+    if isinstance(value, str):
+        return float(value.split(' ')[0])
+    if isinstance(value, dict):
+        return float(value['amount']) / (10 ** value.get('precision', 0))
+    return float(value.amount)
+
+
+class ChainParamsSnapshot:
+    """Valori globali della catena in un dato istante"""
+    __slots__ = ('platform', 'steem_per_vests', 'reward_balance', 'recent_claims',
+                 'price_ratio', 'head_block', 'fetched_at')
+
+    def __init__(self, platform, props, reward_fund, median_price):
+        total_vesting_fund = props.get('total_vesting_fund_steem', props.get('total_vesting_fund_hive'))
+        self.platform = platform
+        self.steem_per_vests = _amount(total_vesting_fund) / _amount(props['total_vesting_shares'])
+        self.reward_balance = _amount(reward_fund['reward_balance'])
+        self.recent_claims = float(reward_fund['recent_claims'])
+        self.price_ratio = _amount(median_price['base']) / _amount(median_price['quote'])
+        self.head_block = int(props.get('head_block_number', 0))
+        self.fetched_at = time.time()
+
+    @property
+    def rb_prc(self):
+        return self.reward_balance / self.recent_claims
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+    def vests_to_sp(self, vests):
+        return vests * self.steem_per_vests
+
+    def to_dict(self):
+        return {
+            'platform': self.platform,
+            'steem_per_vests': self.steem_per_vests,
+            'reward_balance': self.reward_balance,
+            'recent_claims': self.recent_claims,
+            'price_ratio': self.price_ratio,
+            'head_block': self.head_block,
+            'age_seconds': round(self.age, 1)
+        }
+
+
+class ChainParamsService:
+    """Cache condivisa degli snapshot per piattaforma, aggiornata da un thread in background"""
+
+    def __init__(self, ttl=SNAPSHOT_TTL_SECONDS, max_stale=MAX_STALE_SECONDS, client=None, timeout=5):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.timeout = timeout
+        self.client = client or async_rpc
+        self._snapshots = {}
+        self._platforms = set()  # Piattaforme richieste almeno una volta, da tenere aggiornate
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._refresh_loop, name="ChainParamsRefresh", daemon=True)
+            self._thread.start()
+
+    def _refresh_loop(self):
+        while True:
+            for platform in list(self._platforms):
+                snapshot = self._snapshots.get(platform)
+                if snapshot is None or snapshot.age >= self.ttl:
+                    try:
+                        self.refresh(platform)
+                    except Exception as e:
+                        logger.error(f"Errore nell'aggiornamento dei parametri di {platform}: {e}")
+            time.sleep(BLOCK_INTERVAL_SECONDS)
+
+    def get(self, platform='steem'):
+        """Restituisce lo snapshot corrente; lo scarica solo se assente o troppo vecchio"""
+        platform = platform.lower()
+        self._platforms.add(platform)
+        self.start()
+        snapshot = self._snapshots.get(platform)
+        if snapshot is None or snapshot.age >= self.max_stale:
+            snapshot = self.refresh(platform)
+        return snapshot
+
+    def refresh(self, platform):
+        calls = [
+            ("condenser_api.get_dynamic_global_properties", []),
+            ("condenser_api.get_reward_fund", ["post"]),
+            ("condenser_api.get_current_median_history_price", []),
+        ]
+        with self._fetch_lock:
+            try:
+                # Il client asincrono prova i nodi in ordine di salute e aggiorna node_pool
+                results = self.client.run(self.client.call_batch(platform, calls, timeout=self.timeout))
+                errors = [result for result in results if isinstance(result, Exception)]
+                if errors:
+                    raise errors[0]
+                snapshot = ChainParamsSnapshot(platform, *results)
+                self._snapshots[platform] = snapshot
+                return snapshot
+            except Exception as e:
+                logger.error(f"Errore nel recupero dei parametri di {platform}: {e}")
+                last_error = e
+        # In caso di errore meglio uno snapshot vecchio che nessuno
+        snapshot = self._snapshots.get(platform)
+        if snapshot is not None:
+            return snapshot
+        raise Exception(f"Parametri della catena {platform} non disponibili: {last_error}")
+
+
+# Istanza condivisa del servizio
+chain_params = ChainParamsService()
@@ -27,6 +27,17 @@ node_list = {
 log_level = logging.INFO
 log_file_path = "log.txt"
 
+# Numero di utenti per ogni richiesta JSON-RPC batch nella scansione dei blog
+posts_batch_size = 50
+
+# Worker predefiniti per stadio della pipeline dei post (per piattaforma);
+# sovrascrivibili con le impostazioni pipeline_<piattaforma>_<stadio>_workers
+pipeline_workers = {
+    "enrichment": 4,
+    "scheduling": 1
+}
+pipeline_queue_size = 200  # Capacità della coda di ogni stadio
+
 steem_domain ="https://steemit.com"
 hive_domain ="https://peakd.com"
 
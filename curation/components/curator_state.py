@@ -0,0 +1,166 @@
+"""
+Stato del curatore per piattaforma, tenuto in memoria:
+- voting power all'ultimo voto, orario dell'ultimo voto e vests effettivi.
+- Letto dalla catena al primo utilizzo, dopo ogni voto trasmesso e a intervalli lenti.
+- Il voting power attuale è un calcolo locale (rigenerazione lineare in 5 giorni), senza RPC.
+- Proietta quando il voting power tornerà sopra la soglia di voto.
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from .logger_config import logger
+
+VP_REGENERATION_SECONDS = 432000  # 5 giorni per rigenerare il 100%
+VOTE_THRESHOLD = 89  # Sotto questa soglia (%) il curatore non vota
+REFRESH_INTERVAL_SECONDS = 600
+POST_VOTE_REFRESH_DELAY_SECONDS = 6  # Attende che il voto sia incluso in un blocco
+
+
+def regenerated_voting_power(voting_power, last_vote_time, at=None):
+    """Voting power (%) all'istante at, partendo dal valore registrato all'ultimo voto"""
+    if last_vote_time is None:
+        return min(voting_power, 100)
+    at = at or datetime.now(timezone.utc)
+    elapsed = max((at - last_vote_time).total_seconds(), 0)
+    return min(voting_power + elapsed / VP_REGENERATION_SECONDS * 100, 100)
+
+
+def voting_power_after_vote(voting_power, weight):
+    """Voting power (%) dopo un voto al weight% (un voto al 100% consuma il 2% del VP attuale)"""
+    return voting_power - voting_power * abs(weight) / 100 * 0.02
+
+
+class CuratorState:
+    __slots__ = ('platform', 'username', 'voting_power', 'last_vote_time', 'effective_vests', 'refreshed_at')
+
+    def __init__(self, platform, username, voting_power, last_vote_time, effective_vests):
+        self.platform = platform
+        self.username = username
+        self.voting_power = voting_power  # % al momento di last_vote_time
+        self.last_vote_time = last_vote_time
+        self.effective_vests = effective_vests
+        self.refreshed_at = time.monotonic()
+
+    def current_voting_power(self, at=None):
+        return regenerated_voting_power(self.voting_power, self.last_vote_time, at)
+
+    def seconds_until(self, threshold=VOTE_THRESHOLD, at=None):
+        """Secondi prima che il voting power superi la soglia (0 se è già sopra)"""
+        missing = threshold - self.current_voting_power(at)
+        return max(missing, 0) * VP_REGENERATION_SECONDS / 100
+
+    def to_dict(self, threshold=VOTE_THRESHOLD):
+        now = datetime.now(timezone.utc)
+        wait = self.seconds_until(threshold, now)
+        return {
+            'platform': self.platform,
+            'username': self.username,
+            'voting_power': round(self.current_voting_power(now), 2),
+            'last_vote_time': self.last_vote_time.isoformat() if self.last_vote_time else None,
+            'effective_vests': self.effective_vests,
+            'threshold': threshold,
+            'seconds_until_threshold': round(wait),
+            'threshold_at': (now + timedelta(seconds=wait)).isoformat(),
+            'age_seconds': round(time.monotonic() - self.refreshed_at)
+        }
+
+
+class CuratorStateTracker:
+    def __init__(self, refresh_interval=REFRESH_INTERVAL_SECONDS):
+        self.refresh_interval = refresh_interval
+        self.blockchain = None
+        self._states = {}  # platform -> CuratorState
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+
+    def _blockchain(self, blockchain=None):
+        if blockchain is not None:
+            return blockchain
+        if self.blockchain is None:
+            from .beem import Blockchain
+            self.blockchain = Blockchain()
+        return self.blockchain
+
+    def refresh(self, platform, blockchain=None):
+        """Rilegge l'account del curatore dalla catena; restituisce lo stato o None"""
+        blockchain = self._blockchain(blockchain)
+        username = (blockchain.get_curator_info(platform) or {}).get('username')
+        if not username:
+            return None
+        record = blockchain.get_accounts_bulk([username], platform).get(username)
+        if record is None:
+            logger.warning(f"Account del curatore {username} non trovato su {platform}")
+            return None
+        state = CuratorState(platform, username, record.voting_power / 100,
+                             record.last_vote_time, record.effective_vests)
+        with self._lock:
+            self._states[platform] = state
+        logger.debug(f"Stato del curatore {platform} aggiornato: VP {state.current_voting_power():.2f}%")
+        return state
+
+    def get(self, platform, blockchain=None):
+        """Stato del curatore; letto dalla catena solo se manca o è più vecchio di refresh_interval"""
+        with self._lock:
+            state = self._states.get(platform)
+        if state is None or time.monotonic() - state.refreshed_at > self.refresh_interval:
+            try:
+                state = self.refresh(platform, blockchain) or state
+            except Exception as e:
+                logger.error(f"Errore nell'aggiornamento dello stato del curatore {platform}: {e}")
+        return state
+
+    def voting_power(self, platform, blockchain=None):
+        """Voting power attuale (%) o None se lo stato non è disponibile"""
+        state = self.get(platform, blockchain)
+        return state.current_voting_power() if state else None
+
+    def record_vote(self, platform, weight, blockchain=None):
+        """Applica subito il consumo del voto e pianifica la conferma dalla catena"""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            state = self._states.get(platform)
+            if state is not None:
+                state.voting_power = voting_power_after_vote(state.current_voting_power(now), weight)
+                state.last_vote_time = now
+        timer = threading.Timer(POST_VOTE_REFRESH_DELAY_SECONDS, self._safe_refresh, args=(platform, blockchain))
+        timer.daemon = True
+        timer.start()
+
+    def _safe_refresh(self, platform, blockchain=None):
+        try:
+            self.refresh(platform, blockchain)
+        except Exception as e:
+            logger.error(f"Errore nell'aggiornamento dello stato del curatore {platform}: {e}")
+
+    def start(self, platforms, blockchain=None):
+        """Avvia l'aggiornamento periodico per le piattaforme indicate"""
+        if blockchain is not None:
+            self.blockchain = blockchain
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, args=(list(platforms),),
+                                        name="CuratorStateTracker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+
+    def _run(self, platforms):
+        while self._running:
+            for platform in platforms:
+                self._safe_refresh(platform)
+            deadline = time.monotonic() + self.refresh_interval
+            while self._running and time.monotonic() < deadline:
+                time.sleep(1)
+        self._thread = None
+
+    def stats(self, threshold=VOTE_THRESHOLD):
+        with self._lock:
+            states = list(self._states.values())
+        return {state.platform: state.to_dict(threshold) for state in states}
+
+
+# Istanza condivisa dal processo
+curator_state = CuratorStateTracker()
@@ -6,23 +6,65 @@ from datetime import datetime
 DATABASE_URI = 'sqlite:///site.db'  # Path to the SQLite database file
 db = SQLAlchemy()
 
+def user_columns_from_data(data):
+    """Valori delle colonne tipizzate di User ricavati dal JSON dei dati utente"""
+    data = data or {}
+
+    def _number(value, cast):
+        try:
+            return cast(value) if value not in (None, '') else None
+        except (TypeError, ValueError):
+            return None
+
+    vote_delay = data.get('voteDelay')
+    max_votes = data.get('maxVotesPerDay', data.get('votesPerDay'))
+    use_optimal_time = data.get('useOptimalTime')
+    return {
+        'platform': data.get('platform'),
+        'vote_weight': _number(data.get('voteWeight'), float),
+        'vote_delay': str(vote_delay) if vote_delay not in (None, '') else None,
+        'max_votes_per_day': _number(max_votes, int),
+        'use_optimal_time': bool(use_optimal_time) if use_optimal_time is not None else None,
+    }
+
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     data = db.Column(db.JSON, nullable=False)  # Ensure the correct data type
+    # Copie tipizzate dei campi più usati di data, per filtri e conteggi in SQL
+    platform = db.Column(db.String(20), nullable=True, index=True)
+    vote_weight = db.Column(db.Float, nullable=True, index=True)
+    vote_delay = db.Column(db.String(20), nullable=True, index=True)  # minuti o 'auto'
+    max_votes_per_day = db.Column(db.Integer, nullable=True, index=True)
+    use_optimal_time = db.Column(db.Boolean, nullable=True, index=True)
+
+    def set_data(self, data):
+        """Aggiorna il JSON dei dati e le colonne tipizzate derivate"""
+        self.data = data
+        for column, value in user_columns_from_data(data).items():
+            setattr(self, column, value)
 
     def __repr__(self):
         return f'<User  {self.username}>'
 
 class Delegator(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(80), unique=True, nullable=False)
-    vesting_shares = db.Column(db.String(20), nullable=False)  # Memorizza l'ultimo importo
+    platform = db.Column(db.String(20), nullable=False, default='steem')  # steem o hive
+    username = db.Column(db.String(80), nullable=False)
+    vests = db.Column(db.Float, nullable=True)  # VESTS delegati (ultimo importo)
+    sp = db.Column(db.Float, nullable=False, default=0)  # Importo convertito in SP/HP
+    base_score = db.Column(db.Float, nullable=False, default=0)  # Punteggio calcolato in scrittura
     last_operation_id = db.Column(db.String(50), unique=True)  # Previene duplicati
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('platform', 'username', name='uq_delegator_platform_username'),
+        db.Index('ix_delegator_platform_sp', 'platform', 'sp'),
+    )
 
     def __repr__(self):
-        return f'<Delegator  {self.username}>'
+        return f'<Delegator  {self.username} ({self.platform})>'
 
 class Settings(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -32,4 +74,61 @@ class Settings(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
     def __repr__(self):
-        return f'<Settings {self.key}={self.value} ({self.platform or "global"})>'
\ No newline at end of file
+        return f'<Settings {self.key}={self.value} ({self.platform or "global"})>'
+
+class PendingVote(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    platform = db.Column(db.String(20), nullable=False)
+    post_link = db.Column(db.String(512), nullable=False)
+    fire_at = db.Column(db.DateTime, nullable=False, index=True)  # Orario di voto previsto (UTC)
+    data = db.Column(db.JSON, nullable=False)  # Parametri del voto (autore, permlink, peso...)
+    created = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<PendingVote {self.platform} {self.post_link} @ {self.fire_at}>'
+
+
+class CuratorVote(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    platform = db.Column(db.String(20), nullable=False)
+    curator = db.Column(db.String(80), nullable=False)
+    author = db.Column(db.String(80), nullable=False)
+    permlink = db.Column(db.String(256), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)  # Orario del voto (UTC)
+    op_index = db.Column(db.Integer, nullable=True)  # Indice nella history del curatore, se noto
+
+    __table_args__ = (
+        db.UniqueConstraint('platform', 'curator', 'author', 'permlink', name='uq_curator_vote'),
+        db.Index('ix_curator_vote_lookup', 'platform', 'curator', 'timestamp'),
+    )
+
+    def __repr__(self):
+        return f'<CuratorVote {self.curator} -> @{self.author}/{self.permlink}>'
+
+
+class DelegatorChange(db.Model):
+    id = db.Column(db.Integer, primary_key=True)  # Numero di sequenza del feed delle modifiche
+    platform = db.Column(db.String(20), nullable=False, default='steem')
+    username = db.Column(db.String(80), nullable=False)
+    change_type = db.Column(db.String(10), nullable=False)  # new, updated, removed
+    sp = db.Column(db.Float, nullable=True)  # SP dopo la modifica (None se rimosso)
+    previous_sp = db.Column(db.Float, nullable=True)
+    timestamp = db.Column(db.DateTime, nullable=True)  # Orario dell'operazione sulla catena
+    created = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # AUTOINCREMENT: i numeri di sequenza non vengono mai riutilizzati dopo la pulizia del feed
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    def to_dict(self):
+        return {
+            'seq': self.id,
+            'platform': self.platform,
+            'delegator': self.username,
+            'change_type': self.change_type,
+            'sp_amount': self.sp if self.sp is not None else 0,
+            'previous_sp_amount': self.previous_sp,
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None
+        }
+
+    def __repr__(self):
+        return f'<DelegatorChange #{self.id} {self.change_type} {self.username}>'
@@ -2,6 +2,7 @@ from flask import Flask
 import os
 import threading
 from curation.components.db import db
+from curation.components.migrations import run_migrations
 from curation.components.config import TEST, update_config_from_db
 from apscheduler.schedulers.background import BackgroundScheduler
 from curation.components.logger_config import logger
@@ -16,6 +17,8 @@ class AppState:
         if cls._instance is None:
             cls._instance = super(AppState, cls).__new__(cls)
             cls._instance.scheduler = None
+            cls._instance.vote_scheduler = None
+            cls._instance.publisher = None
             cls._instance.threads = []
         return cls._instance
     
@@ -37,6 +40,9 @@ class AppState:
         if self.scheduler:
             self.scheduler.shutdown()
             logger.info("Scheduler fermato")
+
+        if self.vote_scheduler:
+            self.vote_scheduler.stop()
         
         # I thread daemon verranno fermati automaticamente quando il programma termina
         logger.info(f"Registrati {len(self.threads)} thread daemon che verranno fermati con l'app")
@@ -93,6 +99,9 @@ def create_app():
             logger.info("Creazione delle tabelle del database...")
             db.create_all()
             logger.info("Tabelle create con successo")
+
+            # Aggiorna lo schema delle tabelle create dalle versioni precedenti
+            run_migrations(db)
             
             # Inizializza le impostazioni predefinite
             logger.info("Inizializzazione delle impostazioni predefinite...")
@@ -124,6 +133,8 @@ def init_services(app):
     
     # Registra il thread per il publisher
     publisher = SocialMediaPublisher(app)
+    app_state.vote_scheduler = publisher.vote_scheduler
+    app_state.publisher = publisher
     publisher_thread = threading.Thread(
         target=publisher.publish_posts, 
         name="PublisherThread",
@@ -0,0 +1,153 @@
+"""
+Lettura parallela della history di un account per intervalli di indici:
+- [start, stop] viene diviso in intervalli di RANGE_SIZE operazioni.
+- Gli intervalli sono letti in parallelo sui nodi sani, con concorrenza limitata.
+- I risultati sono uniti in ordine di indice, indipendentemente dall'ordine di arrivo.
+- L'avanzamento è consultabile durante la lettura (es. dall'API).
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from beem.account import Account
+from .logger_config import logger
+
+RANGE_SIZE = 5000  # Operazioni per intervallo
+MAX_WORKERS = 4  # Intervalli letti contemporaneamente
+WORKERS_PER_NODE = 2
+
+# Ultima scansione per piattaforma, condivisa tra le istanze (consultata dall'API)
+_scan_progress = {}
+
+
+def get_scan_progress(platform):
+    progress = _scan_progress.get(platform)
+    return progress.to_dict() if progress else None
+
+
+class HistoryScanProgress:
+    """Stato di avanzamento di una scansione a intervalli"""
+
+    def __init__(self, platform, account, start, stop, total_ranges):
+        self.platform = platform
+        self.account = account
+        self.start = start
+        self.stop = stop
+        self.total_ranges = total_ranges
+        self.completed_ranges = 0
+        self.failed_ranges = 0
+        self.ops_found = 0
+        self.started_at = time.time()
+        self.finished_at = None
+        self.error = None
+        self._lock = threading.Lock()
+
+    def range_done(self, ops_found):
+        with self._lock:
+            self.completed_ranges += 1
+            self.ops_found += ops_found
+
+    def range_failed(self):
+        with self._lock:
+            self.failed_ranges += 1
+
+    def finish(self, error=None):
+        self.finished_at = time.time()
+        self.error = error
+
+    @property
+    def running(self):
+        return self.finished_at is None
+
+    def to_dict(self):
+        with self._lock:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+            return {
+                'platform': self.platform,
+                'account': self.account,
+                'start': self.start,
+                'stop': self.stop,
+                'total_ranges': self.total_ranges,
+                'completed_ranges': self.completed_ranges,
+                'failed_ranges': self.failed_ranges,
+                'percent': round(100.0 * self.completed_ranges / self.total_ranges, 1) if self.total_ranges else 100.0,
+                'ops_found': self.ops_found,
+                'running': self.running,
+                'elapsed_seconds': round(elapsed, 1),
+                'error': self.error
+            }
+
+
+class HistoryRangeFetcher:
+    """Legge la history di un account dividendo gli indici tra più nodi"""
+
+    def __init__(self, blockchain, range_size=RANGE_SIZE, max_workers=MAX_WORKERS):
+        self.blockchain = blockchain
+        self.range_size = range_size
+        self.max_workers = max_workers
+
+    def _split(self, start, stop):
+        return [(a, min(a + self.range_size - 1, stop)) for a in range(start, stop + 1, self.range_size)]
+
+    def _fetch_range(self, platform, account_name, range_start, range_stop, only_ops, nodes, offset):
+        """Legge un intervallo partendo dal nodo assegnato e passando ai successivi in caso di errore"""
+        pool = self.blockchain.node_pool
+        ordered = nodes[offset:] + nodes[:offset]
+        last_error = None
+        for node_url in ordered:
+            started = time.time()
+            try:
+                client = self.blockchain.get_client(platform, node_url=node_url)
+                account = Account(account_name, blockchain_instance=client)
+                ops = list(account.history(start=range_start, stop=range_stop, use_block_num=False,
+                                           only_ops=only_ops))
+                pool.report_success(platform, node_url, time.time() - started)
+                return ops
+            except Exception as e:
+                last_error = e
+                logger.warning(f"Intervallo {range_start}-{range_stop} fallito su {node_url}: {e}")
+                pool.report_failure(platform, node_url)
+        raise Exception(f"Intervallo {range_start}-{range_stop} non letto da nessun nodo: {last_error}")
+
+    def fetch(self, platform, account_name, start, stop, only_ops):
+        """Restituisce le operazioni con indice in [start, stop] ordinate per indice"""
+        ranges = self._split(start, stop)
+        progress = HistoryScanProgress(platform, account_name, start, stop, len(ranges))
+        _scan_progress[platform] = progress
+
+        nodes = self.blockchain.node_pool.get_healthy_nodes(platform) or self.blockchain.node_pool.get_nodes(platform)
+        if not nodes:
+            progress.finish(error='Nessun nodo disponibile')
+            raise Exception(f"Nessun nodo disponibile per {platform}")
+        workers = max(1, min(self.max_workers, len(nodes) * WORKERS_PER_NODE, len(ranges)))
+        logger.info(f"Lettura history di {account_name}: {len(ranges)} intervalli su {len(nodes)} nodi "
+                    f"({workers} in parallelo)")
+
+        results = {}
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="HistoryRange") as executor:
+                futures = {
+                    executor.submit(self._fetch_range, platform, account_name, a, b, only_ops, nodes, i % len(nodes)): a
+                    for i, (a, b) in enumerate(ranges)
+                }
+                for future in as_completed(futures):
+                    try:
+                        ops = future.result()
+                    except Exception:
+                        progress.range_failed()
+                        for pending in futures:
+                            pending.cancel()
+                        raise
+                    results[futures[future]] = ops
+                    progress.range_done(len(ops))
+        except Exception as e:
+            progress.finish(error=str(e))
+            raise
+
+        progress.finish()
+        merged = []
+        for range_start in sorted(results):
+            merged.extend(results[range_start])
+        merged.sort(key=lambda op: op.get('index', 0))
+        logger.info(f"History di {account_name} letta in {progress.to_dict()['elapsed_seconds']}s: "
+                    f"{len(merged)} operazioni")
+        return merged
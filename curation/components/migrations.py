@@ -0,0 +1,140 @@
+"""
+Migrazioni dello schema SQLite:
+- db.create_all() crea le tabelle mancanti ma non modifica quelle esistenti.
+- Le migrazioni qui sotto aggiornano le tabelle create dalle versioni precedenti.
+- La versione applicata è salvata in PRAGMA user_version; ogni migrazione
+  controlla comunque lo schema reale, quindi è innocua su un database nuovo.
+"""
+import json
+from sqlalchemy import text
+from .logger_config import logger
+
+# Importo (in SP) che corrisponde al punteggio 100
+SCORE_FULL_SP = 150000
+
+
+def delegator_base_score(sp):
+    """Punteggio di base del delegatore, prima della correzione per il voting power"""
+    return (sp or 0) / SCORE_FULL_SP * 100
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(text(f'PRAGMA table_info("{table}")'))}
+
+
+def _migrate_delegator_numeric(conn):
+    """Delegator: vesting_shares testuale -> colonne numeriche sp/vests, piattaforma e indici"""
+    columns = _columns(conn, 'delegator')
+    if 'vesting_shares' not in columns:
+        return
+    from .db import Delegator
+
+    logger.info("Migrazione tabella delegator allo schema numerico...")
+    conn.execute(text('ALTER TABLE delegator RENAME TO delegator_old'))
+    # Gli indici mantengono il nome anche dopo la rinomina: vanno eliminati prima di ricrearli
+    for (index_name,) in conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'delegator_old' "
+            "AND sql IS NOT NULL")).fetchall():
+        conn.execute(text(f'DROP INDEX "{index_name}"'))
+    Delegator.__table__.create(conn)
+
+    rows = conn.execute(text(
+        'SELECT username, vesting_shares, last_operation_id, timestamp FROM delegator_old')).fetchall()
+    for username, vesting_shares, last_operation_id, timestamp in rows:
+        try:
+            sp = float(vesting_shares)
+        except (TypeError, ValueError):
+            sp = 0.0
+        conn.execute(text(
+            'INSERT INTO delegator (platform, username, vests, sp, base_score, last_operation_id, timestamp) '
+            'VALUES (:platform, :username, NULL, :sp, :base_score, :last_operation_id, :timestamp)'
+        ), {
+            'platform': 'steem', 'username': username, 'sp': sp, 'base_score': delegator_base_score(sp),
+            'last_operation_id': last_operation_id, 'timestamp': timestamp
+        })
+    conn.execute(text('DROP TABLE delegator_old'))
+    logger.info(f"Migrati {len(rows)} delegatori")
+
+
+def _migrate_delegator_change_platform(conn):
+    """DelegatorChange: aggiunge la colonna platform alle tabelle già esistenti"""
+    if 'platform' in _columns(conn, 'delegator_change'):
+        return
+    conn.execute(text("ALTER TABLE delegator_change ADD COLUMN platform VARCHAR(20) NOT NULL DEFAULT 'steem'"))
+
+
+def _migrate_user_columns(conn):
+    """User: colonne tipizzate e indicizzate per piattaforma e configurazione di voto, dal JSON"""
+    from .db import user_columns_from_data
+
+    columns = _columns(conn, 'user')
+    new_columns = {
+        'platform': 'VARCHAR(20)',
+        'vote_weight': 'FLOAT',
+        'vote_delay': 'VARCHAR(20)',
+        'max_votes_per_day': 'INTEGER',
+        'use_optimal_time': 'BOOLEAN',
+    }
+    for name, sql_type in new_columns.items():
+        if name not in columns:
+            conn.execute(text(f'ALTER TABLE "user" ADD COLUMN {name} {sql_type}'))
+    for name in new_columns:
+        conn.execute(text(f'CREATE INDEX IF NOT EXISTS ix_user_{name} ON "user" ({name})'))
+
+    rows = conn.execute(text('SELECT id, data FROM "user"')).fetchall()
+    for user_id, data in rows:
+        try:
+            values = user_columns_from_data(json.loads(data) if isinstance(data, str) else data)
+        except ValueError:
+            continue
+        conn.execute(text(
+            'UPDATE "user" SET platform = :platform, vote_weight = :vote_weight, vote_delay = :vote_delay, '
+            'max_votes_per_day = :max_votes_per_day, use_optimal_time = :use_optimal_time WHERE id = :id'
+        ), dict(values, id=user_id))
+    logger.info(f"Colonne utente popolate per {len(rows)} utenti")
+
+
+def _migrate_delegator_change_sp(conn):
+    """DelegatorChange: importi SP testuali (vesting_shares) -> colonne numeriche sp/previous_sp"""
+    if 'vesting_shares' not in _columns(conn, 'delegator_change'):
+        return
+    from .db import DelegatorChange
+
+    conn.execute(text('ALTER TABLE delegator_change RENAME TO delegator_change_old'))
+    DelegatorChange.__table__.create(conn)
+    # Gli id vengono copiati: sono i numeri di sequenza già consegnati ai client del feed
+    conn.execute(text(
+        'INSERT INTO delegator_change (id, platform, username, change_type, sp, previous_sp, timestamp, created) '
+        'SELECT id, platform, username, change_type, CAST(vesting_shares AS REAL), '
+        'CAST(previous_vesting_shares AS REAL), timestamp, created FROM delegator_change_old'
+    ))
+    # Il contatore AUTOINCREMENT riparte dal valore precedente: i numeri già usati non tornano
+    old_seq = conn.execute(text(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'delegator_change_old'")).scalar()
+    if old_seq:
+        conn.execute(text("DELETE FROM sqlite_sequence WHERE name = 'delegator_change'"))
+        conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('delegator_change', :seq)"),
+                     {'seq': max(old_seq, conn.execute(text('SELECT MAX(id) FROM delegator_change')).scalar() or 0)})
+    conn.execute(text('DROP TABLE delegator_change_old'))
+
+
+# Elenco ordinato: la posizione (1, 2, ...) è la versione dello schema
+MIGRATIONS = [
+    _migrate_delegator_numeric,
+    _migrate_delegator_change_platform,
+    _migrate_user_columns,
+    _migrate_delegator_change_sp,
+]
+
+
+def run_migrations(db):
+    """Applica le migrazioni non ancora eseguite, ciascuna nella propria transazione"""
+    with db.engine.connect() as conn:
+        version = conn.execute(text('PRAGMA user_version')).scalar() or 0
+    for number, migration in enumerate(MIGRATIONS, start=1):
+        if number <= version:
+            continue
+        with db.engine.begin() as conn:
+            migration(conn)
+            conn.execute(text(f'PRAGMA user_version = {number}'))
+        logger.info(f"Migrazione {number} ({migration.__name__}) applicata")
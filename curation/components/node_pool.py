@@ -0,0 +1,188 @@
+"""
+Pool condiviso dei nodi RPC:
+- Un thread in background verifica periodicamente tutti i nodi di node_list.
+- Per ogni nodo mantiene latenza media (EWMA) ed errori consecutivi.
+- get_node() restituisce in O(1) il miglior nodo sano per la piattaforma.
+"""
+import threading
+import time
+import requests
+from .config import node_list
+from .logger_config import logger
+
+PROBE_INTERVAL_SECONDS = 30
+PROBE_TIMEOUT_SECONDS = 5
+MAX_CONSECUTIVE_FAILURES = 3  # Oltre questa soglia il nodo è considerato non sano
+FAILURE_PENALTY_SECONDS = 5.0  # Penalità di latenza per ogni errore consecutivo
+EWMA_ALPHA = 0.3
+
+
+class NodeStats:
+    """Statistiche di salute di un singolo nodo"""
+    __slots__ = ('url', 'latency', 'consecutive_failures', 'total_failures', 'total_successes', 'last_check')
+
+    def __init__(self, url):
+        self.url = url
+        self.latency = None
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.total_successes = 0
+        self.last_check = None
+
+    @property
+    def healthy(self):
+        return self.consecutive_failures < MAX_CONSECUTIVE_FAILURES
+
+    @property
+    def score(self):
+        """Punteggio del nodo: più basso è migliore"""
+        latency = self.latency if self.latency is not None else PROBE_TIMEOUT_SECONDS
+        return latency + self.consecutive_failures * FAILURE_PENALTY_SECONDS
+
+    def to_dict(self):
+        return {
+            'url': self.url,
+            'latency': round(self.latency, 3) if self.latency is not None else None,
+            'consecutive_failures': self.consecutive_failures,
+            'total_failures': self.total_failures,
+            'total_successes': self.total_successes,
+            'healthy': self.healthy,
+            'score': round(self.score, 3),
+            'last_check': self.last_check
+        }
+
+
+class NodePool:
+    """Pool dei nodi con punteggio di salute, condiviso da tutte le istanze di Blockchain"""
+
+    def __init__(self, nodes=None, probe_interval=PROBE_INTERVAL_SECONDS, timeout=PROBE_TIMEOUT_SECONDS):
+        self.nodes = nodes or node_list
+        self.probe_interval = probe_interval
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        self._stats = {
+            platform: {url: NodeStats(url) for url in urls}
+            for platform, urls in self.nodes.items()
+        }
+        # Classifica e miglior nodo precalcolati: l'ordine iniziale è quello di node_list
+        self._ranked = {platform: list(urls) for platform, urls in self.nodes.items()}
+        self._best = {platform: urls[0] if urls else None for platform, urls in self.nodes.items()}
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """Avvia il thread di verifica in background (idempotente)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._probe_loop, name="NodePoolProbe", daemon=True)
+            self._thread.start()
+            logger.info("NodePool: thread di verifica dei nodi avviato")
+
+    def stop(self):
+        self._running = False
+
+    def _probe_loop(self):
+        while self._running:
+            try:
+                self.probe_all()
+            except Exception as e:
+                logger.error(f"NodePool: errore durante la verifica dei nodi: {e}")
+            time.sleep(self.probe_interval)
+
+    def probe_all(self):
+        """Verifica tutti i nodi di tutte le piattaforme"""
+        for platform, urls in self.nodes.items():
+            for url in urls:
+                self.probe(platform, url)
+
+    def probe(self, platform, node_url):
+        """Esegue una chiamata RPC leggera sul nodo e aggiorna il punteggio"""
+        payload = {
+            "jsonrpc": "2.0",
+            "method": "condenser_api.get_dynamic_global_properties",
+            "params": [],
+            "id": 1
+        }
+        start = time.monotonic()
+        try:
+            response = requests.post(node_url, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            if 'result' not in response.json():
+                raise ValueError("risposta RPC senza result")
+            self.report_success(platform, node_url, time.monotonic() - start)
+            return True
+        except Exception as e:
+            logger.debug(f"NodePool: nodo {node_url} non raggiungibile: {e}")
+            self.report_failure(platform, node_url)
+            return False
+
+    def report_success(self, platform, node_url, latency):
+        """Registra una chiamata riuscita (anche da parte dei chiamanti) e aggiorna la classifica"""
+        with self._lock:
+            stats = self._get_stats(platform, node_url)
+            if stats is None:
+                return
+            if stats.latency is None:
+                stats.latency = latency
+            else:
+                stats.latency = EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * stats.latency
+            stats.consecutive_failures = 0
+            stats.total_successes += 1
+            stats.last_check = time.time()
+            self._rerank(platform)
+
+    def report_failure(self, platform, node_url):
+        """Registra un errore sul nodo e aggiorna la classifica"""
+        with self._lock:
+            stats = self._get_stats(platform, node_url)
+            if stats is None:
+                return
+            stats.consecutive_failures += 1
+            stats.total_failures += 1
+            stats.last_check = time.time()
+            self._rerank(platform)
+
+    def _get_stats(self, platform, node_url):
+        return self._stats.get(platform, {}).get(node_url)
+
+    def _rerank(self, platform):
+        """Ricalcola la classifica della piattaforma: i nodi sani prima, poi per punteggio"""
+        stats = self._stats.get(platform, {})
+        ranked = sorted(stats.values(), key=lambda s: (not s.healthy, s.score))
+        self._ranked[platform] = [s.url for s in ranked]
+        self._best[platform] = self._ranked[platform][0] if ranked else None
+
+    def get_node(self, platform):
+        """Restituisce il miglior nodo per la piattaforma senza effettuare chiamate di rete"""
+        if not self._running:
+            self.start()
+        node_url = self._best.get(platform.lower())
+        if node_url is None:
+            raise Exception(f"Nessun nodo configurato per la piattaforma {platform}")
+        return node_url
+
+    def get_nodes(self, platform):
+        """Restituisce tutti i nodi della piattaforma ordinati dal migliore al peggiore"""
+        if not self._running:
+            self.start()
+        return list(self._ranked.get(platform.lower(), []))
+
+    def get_healthy_nodes(self, platform):
+        """Restituisce solo i nodi sani della piattaforma, dal migliore al peggiore"""
+        nodes = self.get_nodes(platform)
+        with self._lock:
+            stats = self._stats.get(platform.lower(), {})
+            return [url for url in nodes if url in stats and stats[url].healthy]
+
+    def stats(self):
+        with self._lock:
+            return {
+                platform: [self._stats[platform][url].to_dict() for url in ranked]
+                for platform, ranked in self._ranked.items()
+            }
+
+
+# Istanza condivisa del pool
+node_pool = NodePool()
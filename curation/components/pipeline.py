@@ -0,0 +1,142 @@
+"""
+Pipeline a stadi per l'elaborazione dei post:
+- Ogni stadio ha una coda limitata e un numero configurabile di worker.
+- Il risultato di un worker (se non None) passa alla coda dello stadio successivo;
+  se quella coda è piena il worker attende (backpressure) e il tempo di attesa viene misurato.
+- Ogni stadio espone profondità della coda, elementi in lavorazione, throughput e latenza.
+"""
+import queue
+import threading
+import time
+from .logger_config import logger
+
+QUEUE_POLL_SECONDS = 1.0
+
+
+class PipelineStage:
+    def __init__(self, name, handler, workers=1, queue_size=100, app=None):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.app = app
+        self.downstream = None
+        self._threads = []
+        self._running = False
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.received = 0
+        self.processed = 0
+        self.forwarded = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0  # Tempo passato ad attendere spazio nella coda successiva
+        self.started_at = None
+
+    def start(self, thread_prefix):
+        self._running = True
+        self.started_at = time.time()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"{thread_prefix}-{self.name}-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._running = False
+
+    def put(self, item):
+        """Accoda un elemento attendendo se la coda è piena; restituisce False se lo stadio è fermo"""
+        while self._running:
+            try:
+                self.queue.put(item, timeout=QUEUE_POLL_SECONDS)
+                with self._lock:
+                    self.received += 1
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        if self.app is not None:
+            with self.app.app_context():
+                self._loop()
+        else:
+            self._loop()
+
+    def _loop(self):
+        while self._running:
+            try:
+                item = self.queue.get(timeout=QUEUE_POLL_SECONDS)
+            except queue.Empty:
+                continue
+            with self._lock:
+                self._in_flight += 1
+            start = time.monotonic()
+            try:
+                result = self.handler(item)
+                ok = True
+            except Exception as e:
+                logger.error(f"Errore nello stadio {self.name}: {e}")
+                result, ok = None, False
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self.busy_seconds += time.monotonic() - start
+                self.queue.task_done()
+            with self._lock:
+                if ok:
+                    self.processed += 1
+                else:
+                    self.failed += 1
+            if result is not None and self.downstream is not None:
+                wait_start = time.monotonic()
+                forwarded = self.downstream.put(result)
+                with self._lock:
+                    self.blocked_seconds += time.monotonic() - wait_start
+                    if forwarded:
+                        self.forwarded += 1
+
+    def stats(self):
+        with self._lock:
+            elapsed = time.time() - self.started_at if self.started_at else 0
+            done = self.processed + self.failed
+            return {
+                'workers': self.workers,
+                'queue_depth': self.queue.qsize(),
+                'queue_capacity': self.queue.maxsize,
+                'in_flight': self._in_flight,
+                'received': self.received,
+                'processed': self.processed,
+                'forwarded': self.forwarded,
+                'failed': self.failed,
+                'throughput_per_minute': round(done / elapsed * 60, 2) if elapsed else 0.0,
+                'avg_latency_seconds': round(self.busy_seconds / done, 3) if done else None,
+                'blocked_seconds': round(self.blocked_seconds, 3)
+            }
+
+
+class Pipeline:
+    """Sequenza di stadi collegati da code limitate"""
+
+    def __init__(self, name, stages):
+        self.name = name
+        self.stages = stages
+        for current, following in zip(stages, stages[1:]):
+            current.downstream = following
+
+    def start(self):
+        for stage in self.stages:
+            stage.start(self.name)
+        logger.info(f"Pipeline {self.name} avviata: " +
+                    ", ".join(f"{stage.name} x{stage.workers}" for stage in self.stages))
+
+    def stop(self):
+        for stage in self.stages:
+            stage.stop()
+
+    def submit(self, item):
+        """Inserisce un elemento nel primo stadio (attende se la coda è piena)"""
+        return self.stages[0].put(item)
+
+    def stats(self):
+        return {stage.name: stage.stats() for stage in self.stages}
@@ -0,0 +1,79 @@
+"""
+Poller dei blog degli utenti seguiti:
+- Raggruppa più utenti in array JSON-RPC batch (dimensione configurabile).
+- I batch partono tutti insieme sull'event loop del client asincrono condiviso
+  (sessione keep-alive e limite di concorrenza per nodo).
+- Ricompone i risultati per utente e misura la durata di ogni scansione.
+"""
+import asyncio
+import threading
+import time
+from .async_rpc import async_rpc, RpcError
+from .config import posts_batch_size
+from .logger_config import logger
+
+
+class BlogPoller:
+    """Recupera l'ultimo post del blog di molti utenti con richieste JSON-RPC batch"""
+
+    def __init__(self, batch_size=posts_batch_size, timeout=10, client=None):
+        self.batch_size = max(1, int(batch_size))
+        self.timeout = timeout
+        self.client = client or async_rpc
+        self._lock = threading.Lock()
+        self.last_scan = {}  # Statistiche dell'ultima scansione per piattaforma
+
+    def _build_batch(self, usernames, limit):
+        return [("condenser_api.get_discussions_by_blog", [{"tag": username, "limit": limit}])
+                for username in usernames]
+
+    async def _fetch_all(self, platform, chunks, limit):
+        return await asyncio.gather(
+            *(self.client.call_batch(platform, self._build_batch(chunk, limit), timeout=self.timeout)
+              for chunk in chunks),
+            return_exceptions=True
+        )
+
+    def fetch_blogs(self, usernames, platform, limit=1):
+        """Restituisce un dizionario {username: [post, ...]} per tutti gli utenti richiesti"""
+        platform = platform.lower()
+        usernames = list(usernames)
+        results = {}
+        failed_batches = 0
+        start = time.monotonic()
+
+        chunks = [usernames[i:i + self.batch_size] for i in range(0, len(usernames), self.batch_size)]
+        responses = self.client.run(self._fetch_all(platform, chunks, limit)) if chunks else []
+
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, Exception):
+                failed_batches += 1
+                logger.error(f"Errore durante il recupero dei post per {len(chunk)} utenti su {platform}: {response}")
+                continue
+            # I risultati del batch sono nello stesso ordine degli utenti
+            for username, result in zip(chunk, response):
+                if isinstance(result, RpcError):
+                    logger.error(f"Errore RPC per {username} su {platform}: {result}")
+                    continue
+                results[username] = result or []
+
+        duration = time.monotonic() - start
+        with self._lock:
+            self.last_scan[platform] = {
+                'users': len(usernames),
+                'batches': (len(usernames) + self.batch_size - 1) // self.batch_size,
+                'failed_batches': failed_batches,
+                'duration_seconds': round(duration, 3),
+                'finished_at': time.time()
+            }
+        logger.info(f"Scansione blog {platform}: {len(usernames)} utenti in {duration:.2f}s "
+                    f"(batch da {self.batch_size}, {failed_batches} falliti)")
+        return results
+
+    def stats(self):
+        with self._lock:
+            return dict(self.last_scan)
+
+
+# Istanza condivisa del poller
+blog_poller = BlogPoller()
@@ -0,0 +1,191 @@
+"""
+Registro incrementale dei voti del curatore per autore:
+- Al primo utilizzo viene popolato dalla history del curatore, fermandosi
+  alla prima operazione più vecchia di 24 ore.
+- Poi si aggiorna solo con le operazioni successive all'ultimo indice visto.
+- Voti e indice massimo (high-water mark) sono salvati nel DB, così il
+  registro resta corretto anche dopo un riavvio.
+- Il controllo del limite giornaliero diventa una ricerca in memoria.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from beem.account import Account
+from .db import db, CuratorVote
+from .logger_config import logger
+try:
+    from ..services.settings_service import SettingsService
+except ImportError:
+    SettingsService = None
+
+VOTE_WINDOW = timedelta(days=1)
+RETENTION = timedelta(days=2)  # I voti più vecchi vengono rimossi dal DB
+MIN_SYNC_INTERVAL_SECONDS = 15  # Intervallo minimo tra due letture della history
+MAX_INCREMENTAL_OPS = 20000  # Oltre questo distacco si ripopola dalla history recente
+
+
+def _parse_timestamp(value):
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    try:
+        return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
+    except ValueError:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class _CuratorLedger:
+    """Stato in memoria del registro di un singolo curatore"""
+
+    def __init__(self, platform, curator):
+        self.platform = platform
+        self.curator = curator
+        self.lock = threading.RLock()
+        self.votes = defaultdict(dict)  # author -> {permlink: timestamp}
+        self.hwm = None  # Ultimo indice della history elaborato
+        self.loaded = False
+        self.last_sync = 0
+
+    @property
+    def hwm_key(self):
+        return f'{self.platform}_{self.curator}_votes_hwm'
+
+    def add(self, author, permlink, timestamp):
+        """Aggiunge un voto; restituisce True se non era già presente"""
+        if permlink in self.votes[author]:
+            return False
+        self.votes[author][permlink] = timestamp
+        return True
+
+    def count(self, author, since):
+        return sum(1 for ts in self.votes.get(author, {}).values() if ts > since)
+
+    def prune(self, before):
+        for author in list(self.votes):
+            permlinks = self.votes[author]
+            for permlink in [p for p, ts in permlinks.items() if ts <= before]:
+                del permlinks[permlink]
+            if not permlinks:
+                del self.votes[author]
+
+
+class VoteLedger:
+    """Registro dei voti condiviso dal processo, indicizzato per (piattaforma, curatore)"""
+
+    def __init__(self):
+        self._ledgers = {}
+        self._lock = threading.Lock()
+
+    def _get_ledger(self, platform, curator):
+        with self._lock:
+            key = (platform, curator)
+            if key not in self._ledgers:
+                self._ledgers[key] = _CuratorLedger(platform, curator)
+            return self._ledgers[key]
+
+    def count_votes(self, blockchain, curator, author, platform):
+        """Numero di voti dati dal curatore all'autore nelle ultime 24 ore"""
+        ledger = self._get_ledger(platform, curator)
+        with ledger.lock:
+            with self._app_context(blockchain.app):
+                if not ledger.loaded:
+                    self._load(ledger)
+                if time.monotonic() - ledger.last_sync >= MIN_SYNC_INTERVAL_SECONDS:
+                    self._sync(blockchain, ledger)
+            return ledger.count(author, datetime.now(timezone.utc) - VOTE_WINDOW)
+
+    def record_vote(self, platform, curator, author, permlink, app=None):
+        """Registra subito un voto appena trasmesso, senza attendere la history"""
+        ledger = self._get_ledger(platform, curator)
+        with ledger.lock:
+            if ledger.add(author, permlink, datetime.now(timezone.utc)):
+                with self._app_context(app):
+                    self._persist(ledger, [(author, permlink, datetime.now(timezone.utc), None)])
+
+    @staticmethod
+    def _app_context(app):
+        return app.app_context() if app else nullcontext()
+
+    def _load(self, ledger):
+        """Carica dal DB i voti recenti e l'indice massimo già elaborato"""
+        since = (datetime.now(timezone.utc) - VOTE_WINDOW).replace(tzinfo=None)
+        rows = CuratorVote.query.filter(
+            CuratorVote.platform == ledger.platform,
+            CuratorVote.curator == ledger.curator,
+            CuratorVote.timestamp > since
+        ).all()
+        for row in rows:
+            ledger.add(row.author, row.permlink, row.timestamp.replace(tzinfo=timezone.utc))
+        if SettingsService:
+            value = SettingsService.get_setting(ledger.hwm_key, platform=ledger.platform)
+            ledger.hwm = int(value) if value else None
+        ledger.loaded = True
+        logger.info(f"VoteLedger {ledger.platform}/{ledger.curator}: caricati {len(rows)} voti, indice {ledger.hwm}")
+
+    def _sync(self, blockchain, ledger):
+        account = Account(ledger.curator, blockchain_instance=blockchain.get_client(ledger.platform))
+        head_index = account.virtual_op_count()
+        new_votes = []
+
+        if ledger.hwm is None or head_index - ledger.hwm > MAX_INCREMENTAL_OPS:
+            # Popolamento iniziale: dalla più recente, fino alla prima operazione fuori finestra
+            since = datetime.now(timezone.utc) - VOTE_WINDOW
+            for op in account.history_reverse(start=head_index, stop=0, use_block_num=False):
+                if _parse_timestamp(op['timestamp']) <= since:
+                    break
+                if op['type'] == 'vote' and op.get('voter') == ledger.curator:
+                    new_votes.append(op)
+        elif head_index > ledger.hwm:
+            for op in account.history(start=ledger.hwm + 1, stop=head_index, use_block_num=False,
+                                      only_ops=['vote']):
+                if op.get('voter') == ledger.curator:
+                    new_votes.append(op)
+
+        added = []
+        for op in new_votes:
+            timestamp = _parse_timestamp(op['timestamp'])
+            if ledger.add(op['author'], op['permlink'], timestamp):
+                added.append((op['author'], op['permlink'], timestamp, op.get('index')))
+
+        ledger.prune(datetime.now(timezone.utc) - VOTE_WINDOW)
+        if added:
+            self._persist(ledger, added)
+        if head_index != ledger.hwm:
+            ledger.hwm = head_index
+            if SettingsService:
+                SettingsService.set_setting(ledger.hwm_key, str(head_index), platform=ledger.platform)
+        ledger.last_sync = time.monotonic()
+
+    def _persist(self, ledger, votes):
+        try:
+            for author, permlink, timestamp, op_index in votes:
+                existing = CuratorVote.query.filter_by(
+                    platform=ledger.platform, curator=ledger.curator, author=author, permlink=permlink
+                ).first()
+                if existing:
+                    if op_index is not None:
+                        existing.op_index = op_index
+                    continue
+                db.session.add(CuratorVote(
+                    platform=ledger.platform,
+                    curator=ledger.curator,
+                    author=author,
+                    permlink=permlink,
+                    timestamp=timestamp.astimezone(timezone.utc).replace(tzinfo=None),
+                    op_index=op_index
+                ))
+            cutoff = (datetime.now(timezone.utc) - RETENTION).replace(tzinfo=None)
+            CuratorVote.query.filter(
+                CuratorVote.platform == ledger.platform,
+                CuratorVote.curator == ledger.curator,
+                CuratorVote.timestamp < cutoff
+            ).delete()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Errore nel salvataggio del registro voti di {ledger.curator}: {e}")
+
+
+# Istanza condivisa del registro
+vote_ledger = VoteLedger()
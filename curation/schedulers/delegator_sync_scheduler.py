@@ -2,10 +2,9 @@
 """
 Scheduler per sincronizzare periodicamente i delegatori:
 - Se il DB è vuoto, recupera tutti i delegatori dalla blockchain e li salva.
-- Altrimenti, recupera solo le modifiche recenti (nuove deleghe o cambiamenti).
+- Altrimenti, legge solo le operazioni successive all'ultimo indice di history elaborato.
 """
 import time
-from datetime import datetime, timedelta
 from curation.components.logger_config import logger
 from curation.components.beem import Blockchain
 from curation.services.delegator_cache_service import DelegatorCacheService
@@ -30,7 +29,7 @@ class DelegatorSyncScheduler:
 
     def sync_delegators(self):
         logger.info(f"[DelegatorSyncScheduler] Avvio sync delegators per {self.platform}")
-        db_delegators = DelegatorCacheService.get_all_delegators()
+        has_delegators = DelegatorCacheService.count_delegators(self.platform) > 0
         # Recupera il curatore attuale
         curator_info = self.blockchain.get_curator_info(self.platform)
         current_curator = curator_info['username']
@@ -40,7 +39,7 @@ class DelegatorSyncScheduler:
 
         if last_synced_curator != current_curator:
             logger.info(f"Cambio curatore rilevato: {last_synced_curator} -> {current_curator}. Pulizia delegatori DB.")
-            DelegatorCacheService.clear_all()
+            DelegatorCacheService.clear_all(self.platform)
             # Aggiorna il curatore nel DB Settings
             if last_synced_setting:
                 last_synced_setting.value = current_curator
@@ -50,21 +49,26 @@ class DelegatorSyncScheduler:
                 db.session.add(new_setting)
             from curation.components.db import db
             db.session.commit()
-            db_delegators = []  # Forza sync completo
+            has_delegators = False  # Forza sync completo
 
-        if not db_delegators:
-            logger.info("Nessun delegator nel DB, recupero completo dalla blockchain...")
-            ops = self.blockchain.get_steem_delegators(self.platform)
-            DelegatorCacheService.bulk_save_or_update(ops)
-            logger.info(f"Salvati {len(ops)} delegatori nel DB.")
+        checkpoint = DelegatorCacheService.get_checkpoint(self.platform, current_curator)
+        if not has_delegators or checkpoint is None:
+            logger.info("Nessun delegator nel DB o nessun checkpoint, recupero completo dalla blockchain...")
+            ops, head_index = self.blockchain.scan_delegations(self.platform)
+            if head_index is None:
+                return
+            counts = DelegatorCacheService.bulk_save_or_update(ops, platform=self.platform)
+            logger.info(f"Salvati {len(ops)} delegatori nel DB ({counts}).")
         else:
-            last_time = DelegatorCacheService.get_last_update_time()
-            logger.info(f"Ultimo aggiornamento delegatori: {last_time}")
-            # Recupera solo le operazioni più recenti dalla blockchain
-            ops = self.blockchain.get_steem_delegators(self.platform, since_time=last_time)
-            new_ops = [op for op in ops if datetime.strptime(op['timestamp'], '%Y-%m-%dT%H:%M:%S') > last_time]
-            if new_ops:
-                DelegatorCacheService.bulk_save_or_update(new_ops)
-                logger.info(f"Aggiornati {len(new_ops)} delegatori nel DB.")
+            logger.info(f"Ultima operazione elaborata per {current_curator}: {checkpoint}")
+            # Legge solo le operazioni successive al checkpoint
+            ops, head_index = self.blockchain.scan_delegations(self.platform, start_index=checkpoint + 1)
+            if head_index is None:
+                return
+            if ops:
+                counts = DelegatorCacheService.bulk_save_or_update(ops, platform=self.platform)
+                logger.info(f"Aggiornati {len(ops)} delegatori nel DB ({counts}).")
             else:
                 logger.info("Nessun nuovo delegator da aggiornare.")
+        if head_index != checkpoint:
+            DelegatorCacheService.set_checkpoint(self.platform, current_curator, head_index)
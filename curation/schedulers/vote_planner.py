@@ -0,0 +1,275 @@
+"""
+Pianificatore dei voti per piattaforma:
+- Vede tutti i voti in attesa, ordinati per orario desiderato, e simula il voting power
+  del curatore: ogni voto consuma weight × 2% del VP, che si rigenera del 20% al giorno.
+- A ogni voto assegna peso e orario senza far scendere il VP sotto la soglia configurata
+  (impostazione vote_vp_floor), scegliendo tra voto ridotto subito e voto pieno posticipato
+  quello con il valore atteso (calculate_vote_value) maggiore.
+- Rispetta maxVotesPerDay contando i voti già dati (registro e voti eseguiti) e quelli
+  già pianificati per lo stesso autore.
+- Il piano è ricalcolato solo dal punto in cui un voto entra o esce dalla coda.
+"""
+import bisect
+import itertools
+import math
+import threading
+from datetime import datetime, timedelta, timezone
+from curation.components.logger_config import logger
+from curation.components.curator_state import (
+    curator_state, regenerated_voting_power, voting_power_after_vote, VOTE_THRESHOLD, VP_REGENERATION_SECONDS
+)
+from curation.services.settings_service import SettingsService
+
+MIN_VOTE_WEIGHT = 1.0  # Peso minimo (%) per cui vale la pena votare
+MAX_VOTE_DELAY_SECONDS = 12 * 3600  # Oltre questo ritardo il voto non porta più ricompense di curation utili
+VOTE_DRAIN_PER_FULL_VOTE = 0.02
+
+
+def max_weight_within_floor(voting_power, floor):
+    """Peso massimo (%) che lascia il VP almeno alla soglia"""
+    if voting_power <= floor:
+        return 0.0
+    weight = (voting_power - floor) / (voting_power * VOTE_DRAIN_PER_FULL_VOTE) * 100
+    return min(math.floor(weight * 100) / 100, 100.0)
+
+
+class PlannedVote:
+    __slots__ = ('post_link', 'author', 'requested_weight', 'target_time', 'max_votes_per_day', 'votes_today',
+                 'seq', 'status', 'reason', 'weight', 'planned_time', 'voting_power', 'expected_value',
+                 'cursor_time', 'cursor_vp')
+
+    def __init__(self, post_link, author, requested_weight, target_time, max_votes_per_day, votes_today, seq):
+        self.post_link = post_link
+        self.author = author
+        self.requested_weight = float(requested_weight)
+        self.target_time = target_time
+        self.max_votes_per_day = max_votes_per_day
+        self.votes_today = votes_today or 0
+        self.seq = seq
+        self.status = 'pending'  # 'planned', 'skipped' o 'pending' (stato del curatore non disponibile)
+        self.reason = None
+        self.weight = None
+        self.planned_time = None
+        self.voting_power = None
+        self.expected_value = None
+        # Simulazione dopo questo voto: da qui riparte il calcolo dei voti successivi
+        self.cursor_time = None
+        self.cursor_vp = None
+
+    @property
+    def key(self):
+        return (self.target_time, self.seq)
+
+    def to_dict(self):
+        return {
+            'post_link': self.post_link,
+            'author': self.author,
+            'status': self.status,
+            'reason': self.reason,
+            'requested_weight': self.requested_weight,
+            'weight': self.weight,
+            'target_time': self.target_time.isoformat(),
+            'planned_time': self.planned_time.isoformat() if self.planned_time else None,
+            'voting_power': round(self.voting_power, 2) if self.voting_power is not None else None,
+            'voting_power_after': round(self.cursor_vp, 2) if self.status == 'planned' else None,
+            'expected_value': self.expected_value
+        }
+
+
+class VotePlanner:
+    def __init__(self, app=None, vote_manager=None, blockchain=None, tracker=None):
+        self.app = app
+        self.vote_manager = vote_manager
+        self.blockchain = blockchain
+        self.tracker = tracker or curator_state
+        self._queues = {}  # platform -> [PlannedVote] ordinati per (target_time, seq)
+        self._executed = {}  # (platform, author) -> orari dei voti eseguiti nelle ultime 24 ore
+        self._lock = threading.RLock()
+        self._seq = itertools.count()
+
+    def vp_floor(self):
+        try:
+            return float(SettingsService.get_setting('vote_vp_floor', default=VOTE_THRESHOLD, app=self.app))
+        except (TypeError, ValueError):
+            return float(VOTE_THRESHOLD)
+
+    # ------------------------------------------------------------------ coda
+    def add(self, platform, post_link, author, weight, target_time, max_votes_per_day=None, votes_today=0):
+        """Inserisce un voto e ripianifica da quel punto; restituisce il piano del voto"""
+        if target_time.tzinfo is None:
+            target_time = target_time.replace(tzinfo=timezone.utc)
+        with self._lock:
+            self._pop(platform, post_link)
+            queue = self._queues.setdefault(platform, [])
+            entry = PlannedVote(post_link, author, weight, target_time, max_votes_per_day, votes_today,
+                                next(self._seq))
+            index = bisect.bisect([item.key for item in queue], entry.key)
+            queue.insert(index, entry)
+            self._replan(platform, index)
+            return entry.to_dict()
+
+    def remove(self, platform, post_link, executed=False):
+        """Toglie un voto e ripianifica i successivi; executed=True lo conta nel limite giornaliero"""
+        with self._lock:
+            if executed:
+                author = next((entry.author for entry in self._queues.get(platform, [])
+                               if entry.post_link == post_link), None)
+                if author is not None:
+                    self._executed.setdefault((platform, author), []).append(datetime.now(timezone.utc))
+            index = self._pop(platform, post_link)
+            if index is not None:
+                self._replan(platform, index)
+
+    def _executed_today(self, platform, author, now):
+        """Voti eseguiti dal pianificatore per l'autore nelle ultime 24 ore"""
+        times = self._executed.get((platform, author))
+        if not times:
+            return 0
+        times[:] = [at for at in times if now - at < timedelta(days=1)]
+        return len(times)
+
+    def _pop(self, platform, post_link):
+        queue = self._queues.get(platform, [])
+        for index, entry in enumerate(queue):
+            if entry.post_link == post_link:
+                del queue[index]
+                return index
+        return None
+
+    def decide(self, platform, post_link, votes_today=None):
+        """Piano aggiornato del voto al momento dell'esecuzione (None se non è in coda).
+
+        votes_today è il conteggio attuale dei voti all'autore nelle ultime 24 ore: sostituisce
+        quello letto in fase di arricchimento, che non include i voti eseguiti nel frattempo.
+        """
+        with self._lock:
+            if votes_today is not None:
+                author = next((entry.author for entry in self._queues.get(platform, [])
+                               if entry.post_link == post_link), None)
+                for entry in self._queues.get(platform, []):
+                    if entry.author == author:
+                        entry.votes_today = votes_today
+            self._replan(platform, 0)
+            for entry in self._queues.get(platform, []):
+                if entry.post_link == post_link:
+                    return entry.to_dict()
+        return None
+
+    def load(self, jobs):
+        """Ricostruisce le code dai voti già programmati (es. dopo un riavvio)"""
+        with self._lock:
+            for job in jobs:
+                data = job.get('data') or {}
+                target = data.get('target_vote_time')
+                target_time = (datetime.fromisoformat(target) if target
+                               else datetime.fromtimestamp(job['fire_at'], timezone.utc))
+                if target_time.tzinfo is None:
+                    target_time = target_time.replace(tzinfo=timezone.utc)
+                queue = self._queues.setdefault(job['platform'], [])
+                self._pop(job['platform'], job['post_link'])
+                entry = PlannedVote(job['post_link'], data.get('author'), data.get('vote_weight', 100), target_time,
+                                    data.get('max_votes_per_day'), data.get('votes_today', 0), next(self._seq))
+                queue.insert(bisect.bisect([item.key for item in queue], entry.key), entry)
+            for platform in self._queues:
+                self._replan(platform, 0)
+        logger.info(f"Pianificatore dei voti: {len(jobs)} voti in attesa ricaricati")
+
+    # ------------------------------------------------------------------ pianificazione
+    def _replan(self, platform, start):
+        queue = self._queues.get(platform, [])
+        if start >= len(queue):
+            return
+        state = self.tracker.get(platform, self.blockchain)
+        if state is None:
+            for entry in queue[start:]:
+                entry.status, entry.reason = 'pending', "Stato del curatore non disponibile"
+            return
+
+        now = datetime.now(timezone.utc)
+        floor = self.vp_floor()
+        previous = queue[start - 1] if start > 0 else None
+        if previous is not None and previous.cursor_time is not None:
+            cursor_time, cursor_vp = previous.cursor_time, previous.cursor_vp
+        else:
+            cursor_time, cursor_vp = now, state.current_voting_power(now)
+
+        planned_by_author = {}
+        for entry in queue[:start]:
+            if entry.status == 'planned':
+                planned_by_author[entry.author] = planned_by_author.get(entry.author, 0) + 1
+
+        for entry in queue[start:]:
+            # Voti già dati: il conteggio del registro o, se maggiore, quelli eseguiti da qui
+            done_today = max(entry.votes_today, self._executed_today(platform, entry.author, now))
+            self._plan_entry(platform, entry, cursor_time, cursor_vp, floor, now, state.effective_vests,
+                             done_today + planned_by_author.get(entry.author, 0))
+            cursor_time, cursor_vp = entry.cursor_time, entry.cursor_vp
+            if entry.status == 'planned':
+                planned_by_author[entry.author] = planned_by_author.get(entry.author, 0) + 1
+
+    def _plan_entry(self, platform, entry, cursor_time, cursor_vp, floor, now, vests, votes_for_author):
+        start_time = max(entry.target_time, cursor_time, now)
+        voting_power = regenerated_voting_power(cursor_vp, cursor_time, start_time)
+        entry.voting_power = voting_power
+        entry.cursor_time, entry.cursor_vp = cursor_time, cursor_vp
+
+        if entry.max_votes_per_day and votes_for_author >= entry.max_votes_per_day:
+            return self._skip(entry, f"limite giornaliero ({entry.max_votes_per_day}) per {entry.author}")
+
+        requested = entry.requested_weight
+        candidates = []
+        weight_now = min(requested, max_weight_within_floor(voting_power, floor))
+        if weight_now >= MIN_VOTE_WEIGHT:
+            candidates.append((start_time, voting_power, weight_now))
+        if weight_now < requested:
+            # Voto pieno quando il VP sarà abbastanza alto da restare sopra la soglia
+            needed = floor / (1 - requested / 100 * VOTE_DRAIN_PER_FULL_VOTE)
+            if needed <= 100:
+                wait = max(needed - voting_power, 0) * VP_REGENERATION_SECONDS / 100
+                vote_time = start_time + timedelta(seconds=wait)
+                if (vote_time - entry.target_time).total_seconds() <= MAX_VOTE_DELAY_SECONDS:
+                    candidates.append((vote_time, max(needed, voting_power), requested))
+        if not candidates:
+            return self._skip(entry, f"voting power {voting_power:.2f}% troppo vicino alla soglia {floor:g}%")
+
+        scored = [(self._expected_value(platform, vp, weight, (vote_time - entry.target_time).total_seconds(), vests),
+                   -vote_time.timestamp(), vote_time, vp, weight)
+                  for vote_time, vp, weight in candidates]
+        value, _, vote_time, vp, weight = max(scored)
+        entry.status, entry.reason = 'planned', None
+        entry.weight = weight
+        entry.planned_time = vote_time
+        entry.voting_power = vp
+        entry.expected_value = round(value, 4)
+        entry.cursor_time = vote_time
+        entry.cursor_vp = voting_power_after_vote(vp, weight)
+
+    def _skip(self, entry, reason):
+        entry.status, entry.reason = 'skipped', reason
+        entry.weight = entry.planned_time = entry.expected_value = None
+
+    def _expected_value(self, platform, voting_power, weight, delay_seconds, vests):
+        """Valore del voto scontato linearmente per il ritardo rispetto all'orario desiderato"""
+        discount = max(0.0, 1 - max(delay_seconds, 0) / MAX_VOTE_DELAY_SECONDS)
+        if self.vote_manager is not None and vests:
+            value = self.vote_manager.calculate_vote_value(weight * 100, vests, voting_power * 100, platform)
+            if 'error' not in value:
+                return value['steem_value'] * discount
+        # Senza parametri della catena il valore è comunque proporzionale a VP × peso
+        return voting_power * weight / 10000 * discount
+
+    def plan(self, platform):
+        with self._lock:
+            return [entry.to_dict() for entry in self._queues.get(platform, [])]
+
+    def stats(self):
+        with self._lock:
+            return {
+                platform: {
+                    'queued': len(queue),
+                    'planned': sum(1 for entry in queue if entry.status == 'planned'),
+                    'skipped': sum(1 for entry in queue if entry.status == 'skipped'),
+                    'final_voting_power': round(queue[-1].cursor_vp, 2) if queue and queue[-1].cursor_vp is not None else None
+                }
+                for platform, queue in self._queues.items()
+            }
@@ -0,0 +1,162 @@
+"""
+Scheduler dei voti:
+- Heap ordinato sull'orario di voto previsto, gestito da un unico thread timer.
+- I voti scaduti vengono eseguiti da un pool di worker, senza bloccare gli altri post.
+- I voti in attesa sono salvati nel DB (PendingVote) e ricaricati al riavvio.
+- Espone profondità della coda e ritardo (orario effettivo - orario previsto).
+"""
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from curation.components.logger_config import logger
+from curation.components.db import db, PendingVote
+
+VOTE_WORKERS = 4  # Numero di worker che eseguono i voti scaduti
+
+
+class VoteScheduler:
+    def __init__(self, app=None, handler=None, max_workers=VOTE_WORKERS):
+        self.app = app
+        self.handler = handler  # Funzione chiamata con il job quando il voto è scaduto
+        self.max_workers = max_workers
+        self._heap = []  # (fire_at_timestamp, seq, job)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._executor = None
+        self._thread = None
+        self._running = False
+        self._in_flight = 0
+        # Metriche di ritardo, in secondi
+        self._lateness = {'count': 0, 'total': 0.0, 'max': 0.0, 'last': None}
+
+    def start(self):
+        """Ricarica i voti persistiti e avvia il thread timer"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="VoteWorker")
+        self._load_pending()
+        self._thread = threading.Thread(target=self._run, name="VoteSchedulerThread", daemon=True)
+        self._thread.start()
+        logger.info(f"VoteScheduler avviato con {len(self._heap)} voti in attesa")
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._executor:
+            self._executor.shutdown(wait=False)
+        logger.info("VoteScheduler fermato")
+
+    def _load_pending(self):
+        with self.app.app_context():
+            rows = PendingVote.query.all()
+        with self._cond:
+            for row in rows:
+                self._push(self._job_from_row(row))
+
+    @staticmethod
+    def _job_from_row(row):
+        return {
+            'id': row.id,
+            'platform': row.platform,
+            'post_link': row.post_link,
+            'fire_at': row.fire_at.replace(tzinfo=timezone.utc).timestamp(),
+            'data': row.data
+        }
+
+    def _push(self, job):
+        heapq.heappush(self._heap, (job['fire_at'], next(self._seq), job))
+
+    def schedule(self, platform, post_link, fire_at, data):
+        """Programma un voto per l'orario fire_at (datetime UTC) e lo salva nel DB"""
+        if fire_at.tzinfo is None:
+            fire_at = fire_at.replace(tzinfo=timezone.utc)
+        with self.app.app_context():
+            row = PendingVote(
+                platform=platform,
+                post_link=post_link,
+                fire_at=fire_at.astimezone(timezone.utc).replace(tzinfo=None),
+                data=data
+            )
+            db.session.add(row)
+            db.session.commit()
+            job = self._job_from_row(row)
+        with self._cond:
+            self._push(job)
+            self._cond.notify()
+        return job['id']
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                delay = self._heap[0][0] - time.time()
+                if delay > 0:
+                    self._cond.wait(timeout=delay)
+                    continue
+                _, _, job = heapq.heappop(self._heap)
+                self._in_flight += 1
+            self._executor.submit(self._execute, job)
+
+    def _execute(self, job):
+        lateness = time.time() - job['fire_at']
+        self._record_lateness(lateness)
+        try:
+            with self.app.app_context():
+                self.handler(job)
+        except Exception as e:
+            logger.error(f"Errore nell'esecuzione del voto per {job['post_link']}: {e}")
+        finally:
+            self._delete(job)
+            with self._cond:
+                self._in_flight -= 1
+
+    def _delete(self, job):
+        try:
+            with self.app.app_context():
+                PendingVote.query.filter_by(id=job['id']).delete()
+                db.session.commit()
+        except Exception as e:
+            logger.error(f"Errore nella rimozione del voto programmato {job['id']}: {e}")
+
+    def _record_lateness(self, lateness):
+        with self._cond:
+            stats = self._lateness
+            stats['count'] += 1
+            stats['total'] += lateness
+            stats['max'] = max(stats['max'], lateness)
+            stats['last'] = lateness
+
+    def stats(self):
+        """Restituisce profondità della coda e statistiche di ritardo"""
+        with self._cond:
+            stats = self._lateness
+            next_fire = self._heap[0][0] if self._heap else None
+            return {
+                'queue_depth': len(self._heap),
+                'in_flight': self._in_flight,
+                'next_vote_at': datetime.fromtimestamp(next_fire, timezone.utc).isoformat() if next_fire else None,
+                'lateness_seconds': {
+                    'count': stats['count'],
+                    'last': round(stats['last'], 3) if stats['last'] is not None else None,
+                    'avg': round(stats['total'] / stats['count'], 3) if stats['count'] else None,
+                    'max': round(stats['max'], 3)
+                }
+            }
+
+    def pending(self, platform=None):
+        """Restituisce i voti in coda ordinati per orario previsto"""
+        with self._cond:
+            jobs = [job for _, _, job in sorted(self._heap)]
+        if platform:
+            jobs = [job for job in jobs if job['platform'] == platform]
+        return jobs
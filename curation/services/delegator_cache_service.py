@@ -4,52 +4,233 @@ Servizio per ottimizzare il recupero dei delegatori:
 - Recupera i delegatori dalla blockchain solo se non presenti nel DB.
 - Salva i nuovi delegatori nel DB.
 - Permette aggiornamenti incrementali (solo modifiche recenti).
+- Registra ogni modifica (nuovo, aggiornato, rimosso) in un feed con numeri di sequenza.
+- Memorizza per ogni curatore l'indice dell'ultima operazione di history elaborata.
 """
 from datetime import datetime, timedelta
-from curation.components.db import db, Delegator
+from curation.components.db import db, Delegator, DelegatorChange
+from curation.components.migrations import delegator_base_score
 from curation.components.logger_config import logger
+from curation.services.settings_service import SettingsService
+
+CHANGE_FEED_RETENTION = 20000  # Modifiche conservate nel feed
 
 class DelegatorCacheService:
     @staticmethod
-    def get_all_delegators():
-        """Restituisce tutti i delegatori dal DB."""
-        return Delegator.query.all()
+    def get_all_delegators(platform='steem', min_sp=None, max_sp=None):
+        """Restituisce tutti i delegatori della piattaforma, dal più grande al più piccolo."""
+        return (DelegatorCacheService._filtered(platform, min_sp, max_sp)
+                .order_by(Delegator.sp.desc(), Delegator.id).all())
+
+    @staticmethod
+    def get_top_delegators(platform='steem', limit=20, offset=0):
+        """Restituisce i primi `limit` delegatori per SP, ordinati dal database."""
+        return (Delegator.query.filter_by(platform=platform)
+                .order_by(Delegator.sp.desc(), Delegator.id)
+                .offset(offset).limit(limit).all())
+
+    @staticmethod
+    def _filtered(platform, min_sp=None, max_sp=None):
+        query = Delegator.query.filter(Delegator.platform == platform)
+        if min_sp is not None:
+            query = query.filter(Delegator.sp >= min_sp)
+        if max_sp is not None:
+            query = query.filter(Delegator.sp <= max_sp)
+        return query
+
+    @staticmethod
+    def count_delegators(platform='steem', min_sp=None, max_sp=None):
+        return DelegatorCacheService._filtered(platform, min_sp, max_sp).count()
+
+    @staticmethod
+    def get_delegators_page(platform='steem', limit=100, cursor=None, min_sp=None, max_sp=None):
+        """Pagina di delegatori ordinati per SP decrescente (paginazione per chiave).
+
+        Args:
+            cursor (tuple): (sp, id) dell'ultimo delegatore della pagina precedente
+
+        Returns:
+            tuple: (delegatori, cursore della pagina successiva o None)
+        """
+        query = DelegatorCacheService._filtered(platform, min_sp, max_sp)
+        if cursor is not None:
+            cursor_sp, cursor_id = cursor
+            query = query.filter(db.or_(
+                Delegator.sp < cursor_sp,
+                db.and_(Delegator.sp == cursor_sp, Delegator.id > cursor_id)
+            ))
+        rows = query.order_by(Delegator.sp.desc(), Delegator.id).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1].sp, rows[-1].id)
+        return rows, next_cursor
+
+    @staticmethod
+    def _apply_op(delegator, op, timestamp):
+        delegator.vests = op.get('vests')
+        delegator.sp = op['converted_sp']
+        delegator.base_score = delegator_base_score(op['converted_sp'])
+        delegator.last_operation_id = op.get('_id')
+        delegator.timestamp = timestamp
 
     @staticmethod
-    def save_or_update_delegator(op):
+    def save_or_update_delegator(op, platform='steem'):
         """Salva o aggiorna un delegator nel DB."""
-        delegator = Delegator.query.filter_by(username=op['delegator']).first()
+        delegator = Delegator.query.filter_by(platform=platform, username=op['delegator']).first()
         if not delegator:
-            delegator = Delegator(
-                username=op['delegator'],
-                vesting_shares=op['converted_sp'],
-                last_operation_id=op.get('_id'),
-                timestamp=datetime.strptime(op['timestamp'], '%Y-%m-%dT%H:%M:%S')
-            )
+            delegator = Delegator(platform=platform, username=op['delegator'])
             db.session.add(delegator)
-        else:
-            delegator.vesting_shares = op['converted_sp']
-            delegator.last_operation_id = op.get('_id')
-            delegator.timestamp = datetime.strptime(op['timestamp'], '%Y-%m-%dT%H:%M:%S')
+        DelegatorCacheService._apply_op(delegator, op, datetime.strptime(op['timestamp'], '%Y-%m-%dT%H:%M:%S'))
         db.session.commit()
 
     @staticmethod
-    def bulk_save_or_update(ops):
+    def bulk_save_or_update(ops, platform='steem', chunk_size=500):
+        """Salva, aggiorna o rimuove un lotto di delegatori in un'unica transazione.
+
+        Le righe esistenti vengono caricate con poche SELECT (a blocchi di chunk_size)
+        e il commit avviene una sola volta alla fine. Le operazioni con op['removed']
+        eliminano il delegatore. Ogni modifica effettiva viene registrata nel feed
+        DelegatorChange con un numero di sequenza crescente.
+
+        Returns:
+            dict: conteggi {'inserted', 'updated', 'removed', 'unchanged'}
+        """
+        counts = {'inserted': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+        # Per ogni delegatore conta solo l'operazione più recente del lotto
+        latest = {}
         for op in ops:
-            DelegatorCacheService.save_or_update_delegator(op)
+            timestamp = datetime.strptime(op['timestamp'], '%Y-%m-%dT%H:%M:%S')
+            current = latest.get(op['delegator'])
+            if current is None or timestamp >= current[1]:
+                latest[op['delegator']] = (op, timestamp)
+        if not latest:
+            return counts
+
+        usernames = list(latest)
+        existing = {}
+        for i in range(0, len(usernames), chunk_size):
+            chunk = usernames[i:i + chunk_size]
+            for delegator in Delegator.query.filter(Delegator.platform == platform,
+                                                    Delegator.username.in_(chunk)).all():
+                existing[delegator.username] = delegator
+
+        try:
+            for username, (op, timestamp) in latest.items():
+                delegator = existing.get(username)
+                if op.get('removed'):
+                    if delegator is None:
+                        counts['unchanged'] += 1
+                        continue
+                    db.session.add(DelegatorChange(
+                        platform=platform, username=username, change_type='removed',
+                        previous_sp=delegator.sp, timestamp=timestamp
+                    ))
+                    db.session.delete(delegator)
+                    counts['removed'] += 1
+                elif delegator is None:
+                    delegator = Delegator(platform=platform, username=username)
+                    DelegatorCacheService._apply_op(delegator, op, timestamp)
+                    db.session.add(delegator)
+                    db.session.add(DelegatorChange(
+                        platform=platform, username=username, change_type='new',
+                        sp=op['converted_sp'], timestamp=timestamp
+                    ))
+                    counts['inserted'] += 1
+                elif (delegator.sp == op['converted_sp']
+                        and delegator.last_operation_id == op.get('_id')
+                        and delegator.timestamp == timestamp):
+                    counts['unchanged'] += 1
+                else:
+                    db.session.add(DelegatorChange(
+                        platform=platform, username=username, change_type='updated',
+                        sp=op['converted_sp'],
+                        previous_sp=delegator.sp, timestamp=timestamp
+                    ))
+                    DelegatorCacheService._apply_op(delegator, op, timestamp)
+                    counts['updated'] += 1
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        logger.info(f"Delegatori salvati: {counts['inserted']} nuovi, {counts['updated']} aggiornati, "
+                    f"{counts['removed']} rimossi, {counts['unchanged']} invariati")
+        if counts['inserted'] or counts['updated'] or counts['removed']:
+            DelegatorCacheService.prune_changes(platform)
+        return counts
+
+    @staticmethod
+    def get_changes_since(since_seq, platform='steem', limit=1000):
+        """Restituisce le modifiche con numero di sequenza maggiore di since_seq, in ordine"""
+        return (DelegatorChange.query
+                .filter(DelegatorChange.id > since_seq, DelegatorChange.platform == platform)
+                .order_by(DelegatorChange.id)
+                .limit(limit)
+                .all())
+
+    @staticmethod
+    def get_last_change_seq(platform=None):
+        """Numero di sequenza dell'ultima modifica registrata (0 se nessuna)"""
+        query = db.session.query(db.func.max(DelegatorChange.id))
+        if platform:
+            query = query.filter(DelegatorChange.platform == platform)
+        return query.scalar() or 0
+
+    @staticmethod
+    def get_first_change_seq(platform='steem'):
+        """Numero di sequenza della modifica più vecchia ancora conservata per la piattaforma (None se nessuna)"""
+        return (db.session.query(db.func.min(DelegatorChange.id))
+                .filter(DelegatorChange.platform == platform)
+                .scalar())
 
     @staticmethod
-    def get_last_update_time():
+    def prune_changes(platform='steem', keep=CHANGE_FEED_RETENTION):
+        """Mantiene solo le ultime `keep` modifiche del feed della piattaforma"""
+        cutoff = (db.session.query(DelegatorChange.id)
+                  .filter(DelegatorChange.platform == platform)
+                  .order_by(DelegatorChange.id.desc())
+                  .offset(keep)
+                  .limit(1)
+                  .scalar())
+        if cutoff is not None:
+            DelegatorChange.query.filter(DelegatorChange.platform == platform,
+                                         DelegatorChange.id <= cutoff).delete(synchronize_session=False)
+            db.session.commit()
+
+    @staticmethod
+    def get_last_update_time(platform='steem'):
         """Restituisce il timestamp più recente tra i delegatori salvati."""
-        last = Delegator.query.order_by(Delegator.timestamp.desc()).first()
-        return last.timestamp if last else None
+        return db.session.query(db.func.max(Delegator.timestamp)).filter(Delegator.platform == platform).scalar()
 
     @staticmethod
-    def get_delegators_since(since_time):
+    def get_delegators_since(since_time, platform='steem'):
         """Restituisce i delegatori aggiornati dopo una certa data."""
-        return Delegator.query.filter(Delegator.timestamp > since_time).all()
+        return Delegator.query.filter(Delegator.platform == platform, Delegator.timestamp > since_time).all()
+
+    @staticmethod
+    def _checkpoint_key(platform, curator):
+        return f'{platform}_{curator}_delegation_hwm'
+
+    @staticmethod
+    def get_checkpoint(platform, curator):
+        """Indice dell'ultima operazione di history del curatore già elaborata (None se assente)"""
+        value = SettingsService.get_setting(DelegatorCacheService._checkpoint_key(platform, curator), platform=platform)
+        try:
+            return int(value) if value not in (None, '') else None
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def set_checkpoint(platform, curator, index):
+        SettingsService.set_setting(DelegatorCacheService._checkpoint_key(platform, curator), str(index), platform=platform)
 
     @staticmethod
-    def clear_all():
-        Delegator.query.delete()
+    def clear_all(platform='steem'):
+        """Elimina tutti i delegatori della piattaforma registrando una modifica 'removed' per ciascuno"""
+        rows = db.session.query(Delegator.username, Delegator.sp).filter(Delegator.platform == platform).all()
+        for username, sp in rows:
+            db.session.add(DelegatorChange(
+                platform=platform, username=username, change_type='removed', previous_sp=sp
+            ))
+        Delegator.query.filter_by(platform=platform).delete(synchronize_session=False)
         db.session.commit()
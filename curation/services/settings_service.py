@@ -15,6 +15,8 @@ class SettingsService:
         'hive_curator_posting_key': '',  # Le chiavi vengono impostate tramite UI
         'admin_ids': '1026795763',  # Lista di admin IDs separati da virgola
         'bot_token': '',  # Token del bot
+        'post_ingestion_mode': 'poll',  # 'poll' (blog degli utenti) o 'stream' (blocchi della catena)
+        'vote_vp_floor': '89',  # Voting power (%) sotto cui il pianificatore non fa scendere il curatore
     }
     
     @staticmethod
@@ -0,0 +1,107 @@
+"""
+Registro in memoria degli utenti seguiti, condiviso dal processo:
+- Caricato dal DB con una sola query al primo utilizzo.
+- Indicizzato per (piattaforma, username): le ricerche del ciclo di voto sono accessi a dizionario.
+- Aggiornato da UserService a ogni scrittura; invalidate() forza la rilettura dal DB.
+"""
+import threading
+from ..components.db import User
+from ..components.logger_config import logger
+
+
+class UserRegistry:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._by_key = {}  # (platform, username) -> dati utente
+        self._by_platform = {}  # platform -> {username: None} (ordine di inserimento)
+        self._platform_of = {}  # username -> platform
+
+    def _ensure_loaded(self, app=None):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if app is not None:
+                with app.app_context():
+                    users = User.query.all()
+            else:
+                users = User.query.all()
+            self._by_key.clear()
+            self._by_platform.clear()
+            self._platform_of.clear()
+            for user in users:
+                self._add(user.username, user.data or {})
+            self._loaded = True
+            logger.info(f"Registro utenti caricato: {len(users)} utenti")
+
+    def _add(self, username, data):
+        platform = data.get('platform')
+        self._remove(username)
+        self._by_key[(platform, username)] = data
+        self._by_platform.setdefault(platform, {})[username] = None
+        self._platform_of[username] = platform
+
+    def _remove(self, username):
+        if username not in self._platform_of:
+            return
+        platform = self._platform_of.pop(username)
+        self._by_key.pop((platform, username), None)
+        self._by_platform.get(platform, {}).pop(username, None)
+
+    def invalidate(self):
+        """Scarta il contenuto: verrà ricaricato dal DB alla prossima lettura"""
+        with self._lock:
+            self._loaded = False
+
+    def upsert(self, username, data):
+        with self._lock:
+            if self._loaded:
+                self._add(username, dict(data or {}))
+
+    def remove(self, username):
+        with self._lock:
+            if self._loaded:
+                self._remove(username)
+
+    def clear(self):
+        with self._lock:
+            self._by_key.clear()
+            self._by_platform.clear()
+            self._platform_of.clear()
+            self._loaded = True
+
+    def get_usernames(self, platform, app=None):
+        self._ensure_loaded(app)
+        with self._lock:
+            return list(self._by_platform.get(platform, ()))
+
+    def get(self, username, platform=None, app=None):
+        """Dati dell'utente; con platform=None cerca lo username su qualsiasi piattaforma"""
+        self._ensure_loaded(app)
+        with self._lock:
+            if platform is None:
+                platform = self._platform_of.get(username)
+            return self._by_key.get((platform, username))
+
+    def get_for_post(self, post_link, platform=None, app=None):
+        """Utente autore del post, individuato dall'@autore del link"""
+        from ..components.beem import Blockchain
+        try:
+            author, _ = Blockchain.parse_post_url(post_link)
+        except ValueError:
+            return None
+        return self.get(author, platform, app)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'loaded': self._loaded,
+                'users': len(self._by_key),
+                'by_platform': {str(p): len(users) for p, users in self._by_platform.items()}
+            }
+
+
+# Istanza condivisa dal processo
+user_registry = UserRegistry()
@@ -2,6 +2,7 @@ from ..components.db import User, db
 from flask import current_app, Flask
 import logging
 from ..components.logger_config import logger
+from .user_registry import user_registry
 
 class UserService:
     """Servizio centralizzato per la gestione degli utenti"""
@@ -25,6 +26,28 @@ class UserService:
             logger.error("Nessun contesto applicazione disponibile e nessun app fornito")
             raise
     
+    @staticmethod
+    def _users_query(platform=None):
+        query = User.query
+        if platform:
+            query = query.filter(User.platform == platform)
+        return query
+
+    @staticmethod
+    def count_users_by_platform(app=None):
+        """Restituisce {piattaforma: numero di utenti}, calcolato da SQLite"""
+        try:
+            ctx = UserService._ensure_app_context(app)
+            if ctx:
+                with ctx:
+                    rows = db.session.query(User.platform, db.func.count(User.id)).group_by(User.platform).all()
+            else:
+                rows = db.session.query(User.platform, db.func.count(User.id)).group_by(User.platform).all()
+            return {platform: count for platform, count in rows}
+        except Exception as e:
+            logger.error(f"Errore nel conteggio degli utenti: {e}")
+            return {}
+
     @staticmethod
     def get_users_by_platform(platform=None, app=None):
         """Recupera utenti filtrati per piattaforma (o tutti se platform=None)"""
@@ -32,77 +55,37 @@ class UserService:
             ctx = UserService._ensure_app_context(app)
             if ctx:
                 with ctx:
-                    users = User.query.all()
-                    if platform:
-                        return [u for u in users if u.data.get('platform') == platform]
-                    return users
+                    return UserService._users_query(platform).all()
             else:
                 # Siamo già in un contesto
-                users = User.query.all()
-                if platform:
-                    return [u for u in users if u.data.get('platform') == platform]
-                return users
+                return UserService._users_query(platform).all()
         except Exception as e:
             logger.error(f"Errore nel recupero degli utenti dal database: {e}")
             return []
     
     @staticmethod
     def get_usernames_by_platform(platform, app=None):
-        """Restituisce una lista di nomi utente per la piattaforma specificata"""
+        """Restituisce una lista di nomi utente per la piattaforma specificata (dal registro in memoria)"""
         try:
-            ctx = UserService._ensure_app_context(app)
-            if ctx:
-                with ctx:
-                    users = User.query.all()
-                    return [u.username for u in users if u.data.get('platform') == platform]
-            else:
-                # Siamo già in un contesto
-                users = User.query.all()
-                return [u.username for u in users if u.data.get('platform') == platform]
+            return user_registry.get_usernames(platform, app)
         except Exception as e:
             logger.error(f"Errore nel recupero dei nomi utente dal database: {e}")
             return []
     
     @staticmethod
     def get_user_by_username(username, app=None):
-        """Recupera i dati di un utente specifico"""
+        """Recupera i dati di un utente specifico (dal registro in memoria)"""
         try:
-            ctx = UserService._ensure_app_context(app)
-            if ctx:
-                with ctx:
-                    user = User.query.filter_by(username=username).first()
-                    if user:
-                        return user.data
-                    return None
-            else:
-                # Siamo già in un contesto
-                user = User.query.filter_by(username=username).first()
-                if user:
-                    return user.data
-                return None
+            return user_registry.get(username, app=app)
         except Exception as e:
             logger.error(f"Errore nel recupero dell'utente {username} dal database: {e}")
             return None
     
     @staticmethod
-    def get_user_for_post(post_link, app=None):
-        """Trova l'utente associato a un post tramite il link"""
+    def get_user_for_post(post_link, app=None, platform=None):
+        """Trova l'utente autore del post (@autore nel link) nel registro in memoria"""
         try:
-            ctx = UserService._ensure_app_context(app)
-            if ctx:
-                with ctx:
-                    users = User.query.all()
-                    for user in users:
-                        if user.username in post_link:
-                            return user.data
-                    return None
-            else:
-                # Siamo già in un contesto
-                users = User.query.all()
-                for user in users:
-                    if user.username in post_link:
-                        return user.data
-                return None
+            return user_registry.get_for_post(post_link, platform, app)
         except Exception as e:
             logger.error(f"Errore nella ricerca dell'utente per il post {post_link}: {e}")
             return None
@@ -114,18 +97,23 @@ class UserService:
             ctx = UserService._ensure_app_context(app)
             if ctx:
                 with ctx:
-                    new_user = User(username=user_data['username'], data=user_data)
+                    new_user = User(username=user_data['username'])
+                    new_user.set_data(user_data)
                     db.session.add(new_user)
                     db.session.commit()
+                    user_registry.upsert(new_user.username, user_data)
                     return True
             else:
                 # Siamo già in un contesto
-                new_user = User(username=user_data['username'], data=user_data)
+                new_user = User(username=user_data['username'])
+                new_user.set_data(user_data)
                 db.session.add(new_user)
                 db.session.commit()
+                user_registry.upsert(new_user.username, user_data)
                 return True
         except Exception as e:
             logger.error(f"Errore nell'aggiunta dell'utente al database: {e}")
+            user_registry.invalidate()
             return False
     
     @staticmethod
@@ -137,16 +125,18 @@ class UserService:
                 with ctx:
                     user = User.query.filter_by(username=username).first()
                     if user:
-                        user.data = user_data
+                        user.set_data(user_data)
                         db.session.commit()
+                        user_registry.upsert(username, user_data)
                         return True
                     return False
             else:
                 # Siamo già in un contesto
                 user = User.query.filter_by(username=username).first()
                 if user:
-                    user.data = user_data
+                    user.set_data(user_data)
                     db.session.commit()
+                    user_registry.upsert(username, user_data)
                     return True
                 return False
         except Exception as e:
@@ -164,6 +154,7 @@ class UserService:
                     if user:
                         db.session.delete(user)
                         db.session.commit()
+                        user_registry.remove(username)
                         return True
                     return False
             else:
@@ -172,6 +163,7 @@ class UserService:
                 if user:
                     db.session.delete(user)
                     db.session.commit()
+                    user_registry.remove(username)
                     return True
                 return False
         except Exception as e:
@@ -187,11 +179,13 @@ class UserService:
                 with ctx:
                     num_deleted = User.query.delete()
                     db.session.commit()
+                    user_registry.clear()
                     logger.info(f"Eliminati {num_deleted} utenti dal database.")
                     return True
             else:
                 num_deleted = User.query.delete()
                 db.session.commit()
+                user_registry.clear()
                 logger.info(f"Eliminati {num_deleted} utenti dal database.")
                 return True
         except Exception as e:
@@ -1,15 +1,24 @@
-import requests
+import threading
 import time
 from datetime import datetime, timedelta, timezone
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from .components.logger_config import logger
-from .components.config import steem_domain, hive_domain
+from .components.config import steem_domain, hive_domain, pipeline_workers, pipeline_queue_size
 from .components.beem import Blockchain
+from .components.block_stream import BlockStreamWatcher
+from .components.pipeline import Pipeline, PipelineStage
+from .components.curator_state import curator_state
+from .schedulers.vote_scheduler import VoteScheduler
+from .schedulers.vote_planner import VotePlanner, MAX_VOTE_DELAY_SECONDS
 from .services.user_service import UserService
 from .services.settings_service import SettingsService
 from .utils.vote import VoteManager
+from .utils.telegram import telegram_notifier
 
+# Un voto pianificato più avanti di così rispetto all'esecuzione viene riprogrammato
+RESCHEDULE_TOLERANCE_SECONDS = 60
+# Attesa prima di riprovare un voto quando il voting power del curatore non è disponibile
+PENDING_RETRY_SECONDS = 300
 
 class SocialMediaPublisher:
     def __init__(self, app=None):
@@ -40,6 +49,40 @@ class SocialMediaPublisher:
         self.beem = Blockchain(app=self.app)
         self.published_links = {"steem": set(), "hive": set()}
         self.running = True
+
+        # Modalità di rilevamento dei nuovi post: 'poll' (blog degli utenti) o 'stream' (blocchi)
+        self.ingestion_mode = SettingsService.get_setting('post_ingestion_mode', default='poll', app=self.app)
+        self.stream_watchers = {
+            platform: BlockStreamWatcher(self.beem, platform)
+            for platform in ("steem", "hive")
+        }
+        logger.info(f"Modalità di rilevamento dei post: {self.ingestion_mode}")
+
+        # I voti vengono programmati invece di attendere nel thread di elaborazione
+        self.vote_scheduler = VoteScheduler(app=self.app, handler=self.execute_vote)
+        # Peso e orario dei voti in coda, entro il budget di voting power del curatore
+        self.planner = VotePlanner(app=self.app, vote_manager=self.vote, blockchain=self.beem)
+
+        # Una pipeline per piattaforma: scoperta -> arricchimento -> programmazione;
+        # la trasmissione dei voti è l'ultimo stadio, gestito dal VoteScheduler
+        self.pipelines = {platform: self._build_pipeline(platform) for platform in ("steem", "hive")}
+        self.discovery_stats = {platform: {'iterations': 0, 'new_posts': 0, 'last_duration_seconds': None}
+                                for platform in ("steem", "hive")}
+        self._discovery_threads = []
+
+    def _build_pipeline(self, platform):
+        def workers(stage):
+            key = f'pipeline_{platform}_{stage}_workers'
+            try:
+                return int(SettingsService.get_setting(key, default=pipeline_workers[stage], app=self.app))
+            except (TypeError, ValueError):
+                return pipeline_workers[stage]
+
+        return Pipeline(platform, [
+            PipelineStage('enrichment', self.enrich_post, workers('enrichment'), pipeline_queue_size, app=self.app),
+            PipelineStage('scheduling', self.schedule_planned_vote, workers('scheduling'), pipeline_queue_size,
+                          app=self.app),
+        ])
     
     def update_user_data(self):
         """Raccoglie gli utenti per piattaforma usando direttamente il database."""
@@ -65,24 +108,36 @@ class SocialMediaPublisher:
         try:
             new_links = []
             domain = steem_domain if platform == "steem" else hive_domain
-            posts = self.beem.get_posts(usernames, platform)
+            if self.ingestion_mode == 'stream':
+                posts = self.stream_watchers[platform].fetch_new_posts(usernames)
+            else:
+                posts = self.beem.get_posts(usernames, platform)
             
             for link in posts:
                 if link not in self.published_links[platform]:
                     new_links.append(link)
                     self.published_links[platform].add(link)
             
+            # I post passano allo stadio di arricchimento; se la coda è piena la scoperta attende
             for link in new_links:
-                post_link = f"{domain}{link}"
-                try:
-                    self.handle_voting(platform, post_link)
-                except Exception as e:
-                    logger.error(f"Errore durante il voto su {post_link}: {str(e)}")
+                self.pipelines[platform].submit((platform, f"{domain}{link}"))
+            return len(new_links)
         except Exception as e:
             logger.error(f"Errore durante l'elaborazione dei post per {platform}: {str(e)}")
+            return 0
     
     def handle_voting(self, platform, post_link):
-        """Gestisce il processo di voto per un post."""
+        """Gestisce il processo di voto per un post in modo sincrono (arricchimento + programmazione)."""
+        plan = self.enrich_post((platform, post_link))
+        if plan is not None:
+            self.schedule_planned_vote(plan)
+
+    def enrich_post(self, item):
+        """Stadio di arricchimento: utente, VP, voti di oggi e orario di voto.
+
+        Restituisce il piano di voto da programmare o None se il post va scartato.
+        """
+        platform, post_link = item
         # Ottieni informazioni dall'utente e dalle impostazioni con context handling
         try:
             user_data = None
@@ -92,12 +147,12 @@ class SocialMediaPublisher:
             # Usa app_context se self.app è disponibile
             if self.app:
                 with self.app.app_context():
-                    user_data = UserService.get_user_for_post(post_link, self.app)
+                    user_data = UserService.get_user_for_post(post_link, self.app, platform=platform)
                     admin_ids = SettingsService.get_setting('admin_ids', default='', app=self.app)
                     bot_token = SettingsService.get_setting('bot_token', default='', app=self.app)
             else:
                 # Altrimenti prova senza context
-                user_data = UserService.get_user_for_post(post_link, self.app)
+                user_data = UserService.get_user_for_post(post_link, self.app, platform=platform)
                 admin_ids = SettingsService.get_setting('admin_ids', default='', app=self.app)
                 bot_token = SettingsService.get_setting('bot_token', default='', app=self.app)
         except Exception as e:
@@ -116,28 +171,16 @@ class SocialMediaPublisher:
 
             curator_info = self.beem.get_curator_info(platform)
             curator = curator_info['username']
-            curator_key = curator_info['posting_key']
 
-            # Profilo curatore e autore
-            curator_profile = (
-                self.beem.get_steem_profile_info(curator)
-                if platform == "steem"
-                else self.beem.get_hive_profile_info(curator)
-            )
-            last_vote_time = curator_profile['result'][0]['last_vote_time']
-            old_voting_power = curator_profile['result'][0]['voting_power'] / 100
-            voting_power = self.beem.calculate_voting_power(last_vote_time, old_voting_power)
-
-            author = (
-                self.beem.get_steem_author(post_link)
-                if platform == "steem"
-                else self.beem.get_hive_author(post_link)
-            )
-            permlink = (
-                self.beem.get_steem_permlink(post_link)
-                if platform == "steem"
-                else self.beem.get_hive_permlink(post_link)
-            )
+            # Voting power del curatore dallo stato in memoria (nessuna RPC per post).
+            # Se lo stato non è disponibile il voto resta in attesa nel VotePlanner.
+            voting_power = curator_state.voting_power(platform, blockchain=self.beem)
+            vp_text = f"{voting_power:.2f}" if voting_power is not None else "n/d"
+
+            # Autore e permlink vengono estratti dal link; il post viene scaricato una sola volta
+            post = self.beem.resolve_post(post_link, platform)
+            author = post.author
+            permlink = post.permlink
 
             # Controllo limite voti giornalieri
             votes_today = self.beem.get_votes_today(curator, author, platform)
@@ -155,8 +198,8 @@ class SocialMediaPublisher:
                 previous_posts = self.beem.get_previous_author_posts(author, platform, limit=1)
                 if previous_posts:
                     all_voters_data = []
-                    for post in previous_posts:
-                        post_permlink = post.get('permlink', '')
+                    for previous_post in previous_posts:
+                        post_permlink = previous_post.get('permlink', '')
                         if post_permlink:
                             post_voters = self.vote.get_post_voters(f"@{author}/{post_permlink}", min_importance=0.1)
                             all_voters_data.extend(post_voters)
@@ -164,48 +207,139 @@ class SocialMediaPublisher:
                     vote_delay = optimal_vote_info['optimal_time']
                     vote_explanation = optimal_vote_info['explanation'] + " (basato su post precedenti)"
                     telegram_message = (
-                        f"[{platform.upper()}] (VP: {voting_power:.2f}, OPTIMAL: {vote_delay} min)\n"
+                        f"[{platform.upper()}] (VP: {vp_text}, OPTIMAL: {vote_delay} min)\n"
                         f"{vote_explanation}\n{post_link}"
                     )
                 else:
                     vote_delay = 5
                     telegram_message = (
-                        f"[{platform.upper()}] (VP: {voting_power:.2f}, DEFAULT: {vote_delay} min)\n"
+                        f"[{platform.upper()}] (VP: {vp_text}, DEFAULT: {vote_delay} min)\n"
                         f"Nessun post precedente trovato\n{post_link}"
                     )
             else:
                 vote_delay = user_data['voteDelay']
                 telegram_message = (
-                    f"[{platform.upper()}] (VP: {voting_power:.2f}, DELAY: {vote_delay} min)\n{post_link}"
+                    f"[{platform.upper()}] (VP: {vp_text}, DELAY: {vote_delay} min)\n{post_link}"
                 )
 
             self.send_telegram_message(bot_token, admin_ids, telegram_message)
 
-            # Controllo voting power e stato voto
-            if voting_power <= 89:
-                self.send_telegram_message(bot_token, admin_ids, "Not Voted! Voting power too low.")
-                return
-
-            post = self.beem.get_comment(author=author, permalink=permlink, blockchain=platform)
-            created_time = post['created']
-            votes = getattr(post, 'active_votes', [])
+            # Peso e orario definitivi vengono assegnati dal VotePlanner in base al VP disponibile
+            created_time = post.created
+            votes = post.active_votes
             already_voted = any(v.get('voter') == curator for v in votes)
             target_vote_time = created_time + timedelta(minutes=vote_delay)
-            minutes_until_vote = (target_vote_time - datetime.now(timezone.utc)).total_seconds() / 60
 
             if already_voted:
                 self.send_telegram_message(bot_token, admin_ids, f"Already voted for {post_link}")
                 logger.info(f"Already voted for {post_link}")
                 return
 
-            if not self.running:
-                logger.info("Publisher fermato durante l'attesa del voto")
-                return
+            return {
+                'platform': platform,
+                'post_link': post_link,
+                'author': author,
+                'permlink': permlink,
+                'vote_weight': vote_weight,
+                'target_vote_time': target_vote_time,
+                'max_votes_per_day': max_votes_per_day,
+                'votes_today': votes_today,
+                'bot_token': bot_token,
+                'admin_ids': admin_ids
+            }
+
+        except Exception as e:
+            logger.error(f"Errore durante la gestione del voto per {post_link}: {str(e)}")
+            self.send_telegram_message(bot_token, admin_ids, f"Error during vote: {str(e)}")
+            return None
+
+    def schedule_planned_vote(self, plan):
+        """Stadio di programmazione: consegna il piano di voto al VoteScheduler."""
+        if not self.running:
+            logger.info("Publisher fermato prima della programmazione del voto")
+            return None
+
+        planned = self.planner.add(
+            plan['platform'], plan['post_link'], plan['author'], plan['vote_weight'], plan['target_vote_time'],
+            max_votes_per_day=plan['max_votes_per_day'], votes_today=plan['votes_today']
+        )
+        minutes_until_vote = (plan['target_vote_time'] - datetime.now(timezone.utc)).total_seconds() / 60
+        logger.info(f"Voto programmato tra {max(minutes_until_vote, 0):.1f} minuti per {plan['post_link']} "
+                    f"(piano: {planned['status']}, peso {planned['weight']}, orario {planned['planned_time']})")
+        # Il job parte all'orario desiderato: al momento dell'esecuzione il piano viene ricontrollato
+        self.vote_scheduler.schedule(plan['platform'], plan['post_link'], plan['target_vote_time'], {
+            'author': plan['author'],
+            'permlink': plan['permlink'],
+            'vote_weight': plan['vote_weight'],
+            'target_vote_time': plan['target_vote_time'].isoformat(),
+            'max_votes_per_day': plan['max_votes_per_day'],
+            'votes_today': plan['votes_today']
+        })
+        return None
+
+    def execute_vote(self, job):
+        """Esegue un voto programmato quando è scaduto (chiamato dai worker del VoteScheduler)."""
+        platform = job['platform']
+        post_link = job['post_link']
+        author = job['data']['author']
+        permlink = job['data']['permlink']
+        vote_weight = job['data']['vote_weight']
+
+        admin_ids = SettingsService.get_setting('admin_ids', default='', app=self.app)
+        bot_token = SettingsService.get_setting('bot_token', default='', app=self.app)
+
+        if not self.running:
+            logger.info(f"Publisher fermato, voto non eseguito per {post_link}")
+            return
 
-            if minutes_until_vote > 0:
-                logger.info(f"Waiting {minutes_until_vote:.1f} minutes before voting...")
-                self._safe_sleep(minutes_until_vote * 60)
+        try:
+            # Le credenziali vengono lette al momento del voto, non salvate con il job
+            curator_info = self.beem.get_curator_info(platform)
+            curator = curator_info['username']
+            curator_key = curator_info['posting_key']
+            # Conteggio riletto ora: include i voti all'autore eseguiti dopo l'arricchimento del post
+            votes_today = self.beem.get_votes_today(curator, author, platform)
+        except Exception as e:
+            logger.error(f"Errore durante il voto per {post_link}: {str(e)}")
+            self.send_telegram_message(bot_token, admin_ids, f"Error during vote: {str(e)}")
+            self.planner.remove(platform, post_link)
+            return
+
+        # Peso e orario ricalcolati sullo stato attuale di tutti i voti in coda
+        planned = self.planner.decide(platform, post_link, votes_today=votes_today)
+        if planned is None:
+            target = job['data'].get('target_vote_time')
+            planned = self.planner.add(
+                platform, post_link, author, vote_weight,
+                datetime.fromisoformat(target) if target else datetime.now(timezone.utc),
+                max_votes_per_day=job['data'].get('max_votes_per_day'),
+                votes_today=votes_today
+            )
+        if planned['status'] == 'pending':
+            # Voting power non disponibile: non si vota alla cieca, si riprova più tardi
+            target_time = datetime.fromisoformat(planned['target_time'])
+            now = datetime.now(timezone.utc)
+            if (now - target_time).total_seconds() > MAX_VOTE_DELAY_SECONDS:
+                planned = dict(planned, status='skipped', reason=f"voting power non disponibile ({planned['reason']})")
+            else:
+                retry_at = now + timedelta(seconds=PENDING_RETRY_SECONDS)
+                self.vote_scheduler.schedule(platform, post_link, retry_at, job['data'])
+                logger.warning(f"Voting power non disponibile, voto per {post_link} riprovato alle {retry_at.isoformat()}")
+                return
+        if planned['status'] == 'skipped':
+            self.planner.remove(platform, post_link)
+            logger.info(f"Voto non eseguito per {post_link}: {planned['reason']}")
+            self.send_telegram_message(bot_token, admin_ids, f"Not Voted! {planned['reason']}\n{post_link}")
+            return
+        planned_time = datetime.fromisoformat(planned['planned_time'])
+        if (planned_time - datetime.now(timezone.utc)).total_seconds() > RESCHEDULE_TOLERANCE_SECONDS:
+            # Il VP non basta ancora: il voto viene riprogrammato all'orario pianificato
+            self.vote_scheduler.schedule(platform, post_link, planned_time, job['data'])
+            logger.info(f"Voto per {post_link} posticipato a {planned_time.isoformat()} per il voting power")
+            return
+        vote_weight = planned['weight']
 
+        try:
             if self.is_test_mode:
                 logger.info(f"Voting: {author} {permlink} {vote_weight}")
             else:
@@ -219,39 +353,70 @@ class SocialMediaPublisher:
                         voter=curator, voted=author, permlink=permlink,
                         private_posting_key=curator_key, weight=vote_weight
                     )
+                # Aggiorna subito il registro per il limite giornaliero
+                self.beem.vote_ledger.record_vote(platform, curator, author, permlink, app=self.app)
+                # Consumo del voto applicato subito; lo stato viene poi riletto dalla catena
+                curator_state.record_vote(platform, vote_weight, blockchain=self.beem)
 
-            self.send_telegram_message(bot_token, admin_ids, "Voted!")
+            self.planner.remove(platform, post_link, executed=True)
+            self.send_telegram_message(bot_token, admin_ids, f"Voted! ({vote_weight}%)")
 
         except Exception as e:
-            logger.error(f"Errore durante la gestione del voto per {post_link}: {str(e)}")
+            logger.error(f"Errore durante il voto per {post_link}: {str(e)}")
             self.send_telegram_message(bot_token, admin_ids, f"Error during vote: {str(e)}")
+            self.planner.remove(platform, post_link)
 
     def publish_posts(self):
-        """Controlla e pubblica nuovi post periodicamente."""
+        """Avvia VoteScheduler, pipeline e thread di scoperta, poi attende l'arresto."""
         logger.info("Avvio del publisher dei post")
+        self.vote_scheduler.start()
+        curator_state.start(self.pipelines, blockchain=self.beem)
+        self.planner.load(self.vote_scheduler.pending())
+        for pipeline in self.pipelines.values():
+            pipeline.start()
+        # Ogni piattaforma ha il proprio thread di scoperta: un nodo lento non rallenta l'altra
+        for platform in self.pipelines:
+            thread = threading.Thread(target=self._discovery_loop, args=(platform,),
+                                      name=f"{platform}-discovery", daemon=True)
+            thread.start()
+            self._discovery_threads.append(thread)
+
+        while self.running:
+            self._safe_sleep(5)
+
+        for pipeline in self.pipelines.values():
+            pipeline.stop()
+        logger.info("Publisher dei post fermato")
+
+    def _discovery_loop(self, platform):
+        """Stadio di scoperta: cerca nuovi post degli utenti seguiti e li passa alla pipeline."""
         with self.app.app_context():
-            with ThreadPoolExecutor(max_workers=2) as executor:
-                while self.running:
-                    try:
-                        platform_users = self.update_user_data()
-                        futures = {
-                            executor.submit(self.process_posts, platform, users): platform 
-                            for platform, users in platform_users.items() if users
-                        }
-                        
-                        for future in as_completed(futures):
-                            try:
-                                future.result()
-                            except Exception as e:
-                                platform = futures[future]
-                                logger.error(f"Errore nell'elaborazione dei post per {platform}: {str(e)}")
-                        
-                        self._safe_sleep(5)  # Attendi tra le iterazioni
-                    except Exception as e:
-                        logger.error(f"Errore nel ciclo principale del publisher: {str(e)}")
-                        self._safe_sleep(10)  # Attendi un po' più a lungo in caso di errore
-        
-        logger.info("Publisher dei post fermato")    
+            while self.running:
+                try:
+                    start = time.monotonic()
+                    usernames = UserService.get_usernames_by_platform(platform, self.app)
+                    new_posts = self.process_posts(platform, usernames) if usernames else 0
+                    stats = self.discovery_stats[platform]
+                    stats['iterations'] += 1
+                    stats['new_posts'] += new_posts or 0
+                    stats['last_duration_seconds'] = round(time.monotonic() - start, 3)
+                    self._safe_sleep(5)  # Attendi tra le iterazioni
+                except Exception as e:
+                    logger.error(f"Errore nel ciclo di scoperta dei post per {platform}: {str(e)}")
+                    self._safe_sleep(10)  # Attendi un po' più a lungo in caso di errore
+
+    def pipeline_stats(self):
+        """Statistiche per piattaforma e per stadio (coda, throughput, backpressure)"""
+        broadcast = self.vote_scheduler.stats()
+        return {
+            platform: {
+                'discovery': dict(self.discovery_stats[platform]),
+                **pipeline.stats(),
+                'broadcast': broadcast,
+                'planner': self.planner.stats().get(platform)
+            }
+            for platform, pipeline in self.pipelines.items()
+        }
         
     def _safe_sleep(self, seconds):
         """Sleep che può essere interrotto quando self.running diventa False."""
@@ -263,30 +428,24 @@ class SocialMediaPublisher:
         """Ferma il publisher in modo pulito."""
         logger.info("Arresto del publisher...")
         self.running = False
+        for pipeline in self.pipelines.values():
+            pipeline.stop()
+        self.vote_scheduler.stop()
+        curator_state.stop()
+        for watcher in self.stream_watchers.values():
+            try:
+                watcher._persist_last_block(force=True)
+            except Exception as e:
+                logger.error(f"Errore nel salvataggio dell'ultimo blocco per {watcher.platform}: {e}")
 
     def send_telegram_message(self, bot_token, chat_id, message):
         """
-        Invia un messaggio Telegram a uno o più utenti.
+        Accoda un messaggio Telegram per uno o più utenti; l'invio avviene in background,
+        quindi il ciclo di voto non attende Telegram.
         
         Args:
             bot_token (str): Token del bot Telegram
             chat_id (str): ID chat o lista di ID separati da virgola
-            message (str): Messaggio da inviare
+            message (str): Messaggio da inviare (testo semplice)
         """
-        if not bot_token or not chat_id:
-            logger.warning("Token del bot o chat_id mancanti, impossibile inviare messaggio Telegram")
-            return False
-            
-        # Supporto per più admin ID
-        chat_ids = [id.strip() for id in chat_id.split(',') if id.strip()]
-        
-        results = []
-        for id in chat_ids:
-            try:
-                url = f"https://api.telegram.org/bot{bot_token}/sendMessage?chat_id={id}&text={message}"
-                response = requests.get(url)
-                results.append(response.json())
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Errore comunicazione con server Telegram per chat_id {id}: {e}")
-        
-        return results
+        return telegram_notifier.send_message(bot_token, chat_id, message, parse_mode=None)
@@ -28,8 +28,8 @@ def get_users_by_platform(platform=None):
     """
     query = User.query
     if platform:
-        # Filtra gli utenti in base alla piattaforma
-        query = query.filter(User.data.op("->>")("platform") == platform)
+        # Filtra gli utenti sulla colonna indicizzata della piattaforma
+        query = query.filter(User.platform == platform)
     
     return [user.data for user in query.all()]
 
@@ -1,49 +1,217 @@
+"""
+Notifiche Telegram inviate in background:
+- send_message accoda il messaggio e ritorna subito, senza attendere Telegram.
+- Un thread dispatcher unisce i messaggi per la stessa chat arrivati entro una breve finestra.
+- Rispetta i limiti di Telegram (circa 1 messaggio/s per chat, 30/s in totale).
+- Ritenta con backoff esponenziale, rispettando retry_after in caso di 429.
+- Usa una sessione HTTP persistente; il testo viaggia nel corpo della richiesta, già codificato.
+"""
+import queue
+import threading
+import time
 import requests
 from ..components.logger_config import logger
 
+COALESCE_WINDOW_SECONDS = 2.0  # Messaggi per la stessa chat entro questa finestra diventano uno solo
+PER_CHAT_INTERVAL_SECONDS = 1.0
+GLOBAL_INTERVAL_SECONDS = 1.0 / 30
+MAX_RETRIES = 5
+MAX_BACKOFF_SECONDS = 60
+MAX_MESSAGE_LENGTH = 4096
+REQUEST_TIMEOUT_SECONDS = 10
+
+
+class _Batch:
+    """Messaggi in attesa per una chat (stesso bot e stesse opzioni di invio)"""
+    __slots__ = ('key', 'messages', 'ready_at', 'attempts')
+
+    def __init__(self, key, ready_at):
+        self.key = key  # (bot_token, chat_id, parse_mode, disable_web_page_preview)
+        self.messages = []
+        self.ready_at = ready_at
+        self.attempts = 0
+
+    def take_text(self):
+        """Estrae dai messaggi in coda il testo più lungo possibile entro il limite di Telegram"""
+        parts, length = [], 0
+        while self.messages:
+            message = self.messages[0]
+            extra = len(message) + (2 if parts else 0)
+            if parts and length + extra > MAX_MESSAGE_LENGTH:
+                break
+            parts.append(self.messages.pop(0)[:MAX_MESSAGE_LENGTH])
+            length += extra
+        return "\n\n".join(parts), len(parts)
+
+
+class NotificationDispatcher:
+    def __init__(self, coalesce_window=COALESCE_WINDOW_SECONDS, max_retries=MAX_RETRIES):
+        self.coalesce_window = coalesce_window
+        self.max_retries = max_retries
+        self._queue = queue.Queue()
+        self._batches = {}  # key -> _Batch
+        self._chat_next_send = {}  # (bot_token, chat_id) -> istante minimo del prossimo invio
+        self._next_global_send = 0.0
+        self._session = requests.Session()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.counters = {'enqueued': 0, 'sent': 0, 'coalesced': 0, 'retried': 0, 'failed': 0}
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="TelegramDispatcher", daemon=True)
+                self._thread.start()
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.counters[name] += amount
+
+    def enqueue(self, bot_token, chat_id, message, parse_mode=None, disable_web_page_preview=False):
+        """Accoda il messaggio per ogni chat_id (anche lista separata da virgole); non blocca"""
+        if not bot_token or not chat_id:
+            logger.warning("Token del bot o chat_id mancanti, impossibile inviare messaggio Telegram")
+            return False
+        chat_ids = [id.strip() for id in str(chat_id).split(',') if id.strip()]
+        for id in chat_ids:
+            self._queue.put(((bot_token, id, parse_mode, bool(disable_web_page_preview)), str(message)))
+            self._count('enqueued')
+        self._ensure_started()
+        return True
+
+    def _run(self):
+        while True:
+            try:
+                self._collect(timeout=self._next_wakeup())
+                self._flush_due()
+            except Exception as e:
+                logger.error(f"Errore nel dispatcher Telegram: {e}")
+                time.sleep(1)
+
+    def _next_wakeup(self):
+        if not self._batches:
+            return 1.0
+        soonest = min(max(batch.ready_at, self._chat_next_send.get(batch.key[:2], 0)) for batch in self._batches.values())
+        return min(max(soonest - time.monotonic(), 0.05), 1.0)
+
+    def _collect(self, timeout):
+        """Sposta i messaggi arrivati nei batch per chat"""
+        try:
+            item = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return
+        while item is not None:
+            key, message = item
+            batch = self._batches.get(key)
+            if batch is None:
+                batch = self._batches[key] = _Batch(key, time.monotonic() + self.coalesce_window)
+            else:
+                self._count('coalesced')
+            batch.messages.append(message)
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                item = None
+
+    def _flush_due(self):
+        now = time.monotonic()
+        for key, batch in list(self._batches.items()):
+            chat = key[:2]
+            if batch.ready_at > now or self._chat_next_send.get(chat, 0) > now:
+                continue
+            wait = self._next_global_send - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._next_global_send = time.monotonic() + GLOBAL_INTERVAL_SECONDS
+            self._chat_next_send[chat] = time.monotonic() + PER_CHAT_INTERVAL_SECONDS
+
+            pending = list(batch.messages)
+            text, _ = batch.take_text()
+            sent, delay = self._send(key, text, batch.attempts)
+            if delay is None:
+                batch.attempts = 0
+                self._count('sent' if sent else 'failed')
+            elif batch.attempts + 1 >= self.max_retries:
+                logger.error(f"Messaggio Telegram per {key[1]} scartato dopo {self.max_retries} tentativi")
+                self._count('failed')
+                batch.attempts = 0
+            else:
+                # Rimette in coda i messaggi non inviati e riprova più tardi
+                batch.messages = pending
+                batch.attempts += 1
+                batch.ready_at = time.monotonic() + delay
+                self._count('retried')
+                continue
+            if not batch.messages:
+                del self._batches[key]
+
+    def _send(self, key, text, attempts):
+        """Invia il testo; restituisce (inviato, secondi di attesa prima di riprovare o None)"""
+        bot_token, chat_id, parse_mode, disable_preview = key
+        data = {'chat_id': chat_id, 'text': text,
+                'disable_web_page_preview': 'true' if disable_preview else 'false'}
+        if parse_mode:
+            data['parse_mode'] = parse_mode
+        backoff = min(2 ** attempts, MAX_BACKOFF_SECONDS)
+        try:
+            response = self._session.post(f"https://api.telegram.org/bot{bot_token}/sendMessage",
+                                          data=data, timeout=REQUEST_TIMEOUT_SECONDS)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Errore comunicazione con server Telegram per chat_id {chat_id}: {e}")
+            return False, backoff
+        if response.status_code == 429:
+            try:
+                retry_after = response.json().get('parameters', {}).get('retry_after', backoff)
+            except ValueError:
+                retry_after = backoff
+            logger.warning(f"Limite Telegram raggiunto per {chat_id}, nuovo tentativo tra {retry_after}s")
+            self._chat_next_send[(bot_token, chat_id)] = time.monotonic() + retry_after
+            return False, retry_after
+        if response.status_code >= 500:
+            logger.error(f"Errore del server Telegram ({response.status_code}) per chat_id {chat_id}")
+            return False, backoff
+        if not response.ok:
+            # Errori 4xx (chat inesistente, token errato...): ripetere non serve
+            logger.error(f"Messaggio Telegram rifiutato per {chat_id}: {response.status_code} {response.text[:200]}")
+            return False, None
+        logger.debug(f"Messaggio Telegram inviato a {chat_id}")
+        return True, None
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self.counters, queued=self._queue.qsize(),
+                        pending_chats=len(self._batches),
+                        pending_messages=sum(len(b.messages) for b in list(self._batches.values())))
+
+
+# Dispatcher condiviso dal processo
+notification_dispatcher = NotificationDispatcher()
+
+
 class TelegramNotifier:
-    def __init__(self, app=None):
+    def __init__(self, app=None, dispatcher=None):
         self.app = app
-        
-    def send_message(self, bot_token, chat_id, message, disable_web_page_preview=False):
+        self.dispatcher = dispatcher or notification_dispatcher
+
+    def send_message(self, bot_token, chat_id, message, disable_web_page_preview=False, parse_mode='HTML'):
         """
-        Invia un messaggio Telegram a uno o più utenti.
-        
+        Accoda un messaggio Telegram per uno o più utenti; l'invio avviene in background.
+
         Args:
             bot_token (str): Token del bot Telegram
             chat_id (str): ID chat o lista di ID separati da virgola
             message (str): Messaggio da inviare
             disable_web_page_preview (bool): Se disattivare l'anteprima dei link
-        
+            parse_mode (str): 'HTML', 'MarkdownV2' o None per testo semplice
+
         Returns:
-            list: Lista dei risultati dell'invio per ogni chat_id
+            bool: True se il messaggio è stato accodato
         """
-        if not bot_token or not chat_id:
-            logger.warning("Token del bot o chat_id mancanti, impossibile inviare messaggio Telegram")
-            return False
-            
-        # Supporto per più admin ID
-        chat_ids = [id.strip() for id in str(chat_id).split(',') if id.strip()]
-        
-        results = []
-        for id in chat_ids:
-            try:
-                params = {
-                    'chat_id': id,
-                    'text': message,
-                    'parse_mode': 'HTML',
-                    'disable_web_page_preview': disable_web_page_preview
-                }
-                
-                url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-                response = requests.get(url, params=params)
-                results.append(response.json())
-                logger.debug(f"Messaggio Telegram inviato a {id}")
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Errore comunicazione con server Telegram per chat_id {id}: {e}")
-                results.append({"error": str(e)})
-        
-        return results
+        return self.dispatcher.enqueue(bot_token, chat_id, message, parse_mode=parse_mode,
+                                       disable_web_page_preview=disable_web_page_preview)
 
 # Instanza singleton
-telegram_notifier = TelegramNotifier()
\ No newline at end of file
+telegram_notifier = TelegramNotifier()
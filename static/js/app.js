@@ -498,6 +498,7 @@ class CurationApp {  constructor() {
   async clearAllUsers() {
     // Svuota localStorage e memoria
     storageService.clearUsers();
+    localStorage.removeItem('delegator_changes_seq');
     this.users = new Map();
     this.renderUsersList();
     // Svuota anche il backend
@@ -1056,19 +1057,7 @@ class CurationApp {  constructor() {
             skippedCount++;
             continue;
           }
-          const userData = {
-            username,
-            platform: this.currentPlatform,
-            voteDelay: 'auto',
-            voteWeight: 100,
-            votesPerDay: 1,
-            useOptimalTime: true,
-            timestamp: Date.now(),
-            dailyVotesCount: 0,
-            lastVoteDate: null,            sp_amount: delegator.sp_amount,
-            score: delegator.score || 0,
-            is_delegator: true
-          };
+          const userData = this.buildDelegatorUser(delegator);
           this.users.set(username, userData);
           apiService.addUser(userData).catch(err => {
             console.warn(`Fallita sincronizzazione API per ${username}:`, err);
@@ -1076,6 +1065,10 @@ class CurationApp {  constructor() {
           addedCount++;
         }
         storageService.saveUsers(this.users);
+        // Da qui in poi basta applicare le modifiche successive a questa sequenza
+        if (response.data.last_change_seq !== undefined) {
+          localStorage.setItem('delegator_changes_seq', String(response.data.last_change_seq));
+        }
         this.renderUsersList();
         uiService.showStatus(
           `Importati ${addedCount} delegatori${skippedCount > 0 ? `, ${skippedCount} già presenti` : ''}`,
@@ -1089,6 +1082,90 @@ class CurationApp {  constructor() {
     }
   }
 
+  /**
+   * Crea i dati utente di un delegatore con le impostazioni di voto predefinite
+   * @param {Object} delegator - Delegatore restituito dall'API ({delegator, sp_amount, score})
+   */
+  buildDelegatorUser(delegator) {
+    return {
+      username: delegator.delegator,
+      platform: this.currentPlatform,
+      voteDelay: 'auto',
+      voteWeight: 100,
+      votesPerDay: 1,
+      useOptimalTime: true,
+      timestamp: Date.now(),
+      dailyVotesCount: 0,
+      lastVoteDate: null,
+      sp_amount: delegator.sp_amount,
+      score: delegator.score || 0,
+      is_delegator: true
+    };
+  }
+
+  /**
+   * Applica solo le modifiche ai delegatori avvenute dopo l'ultima sincronizzazione
+   */
+  async applyDelegatorChanges() {
+    const storedSeq = localStorage.getItem('delegator_changes_seq');
+    if (storedSeq === null) {
+      await this.addAllDelegatorsAsUsers();
+      return;
+    }
+    let since = parseInt(storedSeq, 10) || 0;
+    let added = 0, updated = 0, removed = 0;
+    let hasMore = true;
+    while (hasMore) {
+      const response = await apiService.getDelegatorChanges(since);
+      if (!response.success) {
+        throw new Error('Modifiche delegatori non disponibili');
+      }
+      if (response.data.full_resync_required) {
+        localStorage.removeItem('delegator_changes_seq');
+        await this.addAllDelegatorsAsUsers();
+        return;
+      }
+      for (const change of response.data.changes) {
+        const username = change.delegator;
+        const existing = this.users.get(username);
+        if (change.change_type === 'removed') {
+          if (existing && existing.is_delegator) {
+            this.users.delete(username);
+            apiService.deleteUser(username).catch(err => {
+              console.warn(`Fallita rimozione API per ${username}:`, err);
+            });
+            removed++;
+          }
+        } else if (existing) {
+          existing.sp_amount = change.sp_amount;
+          apiService.updateUser(username, existing).catch(err => {
+            console.warn(`Fallito aggiornamento API per ${username}:`, err);
+          });
+          updated++;
+        } else {
+          const userData = this.buildDelegatorUser(change);
+          this.users.set(username, userData);
+          apiService.addUser(userData).catch(err => {
+            console.warn(`Fallita sincronizzazione API per ${username}:`, err);
+          });
+          added++;
+        }
+      }
+      since = response.data.last_seq;
+      hasMore = response.data.has_more;
+    }
+    localStorage.setItem('delegator_changes_seq', String(since));
+    if (added || updated || removed) {
+      storageService.saveUsers(this.users);
+      this.renderUsersList();
+      uiService.showStatus(
+        `Delegatori: ${added} nuovi, ${updated} aggiornati, ${removed} rimossi`,
+        'success',
+        5000
+      );
+    }
+  }
+
   /**
    * Avvia l'aggiornamento automatico periodico dei delegatori
    */
@@ -1096,8 +1173,8 @@ class CurationApp {  constructor() {
     // Aggiorna ogni 5 minuti (300000 ms)
     this.autoUpdateInterval = setInterval(async () => {
       try {
-        console.log('Auto-update: controllo nuovi delegatori...');
-        await this.addAllDelegatorsAsUsers();
+        console.log('Auto-update: controllo modifiche delegatori...');
+        await this.applyDelegatorChanges();
       } catch (error) {
         console.warn('Auto-update failed:', error);
       }
@@ -97,11 +97,37 @@ class ApiService {
   }
 
   /**
-   * Ottiene la lista dei delegatori per Steem
-   * @returns {Promise} Lista dei delegatori
+   * Ottiene la lista dei delegatori per Steem, pagina per pagina
+   * @param {number} pageSize - Delegatori per pagina
+   * @returns {Promise} Lista completa dei delegatori (stesso formato della risposta non paginata)
    */
-  async getSteemDelegators() {
-    return await this.sendRequest('/api/delegators/steem', 'GET');
+  async getSteemDelegators(pageSize = 500) {
+    let cursor = null;
+    let merged = null;
+    do {
+      const params = new URLSearchParams({ limit: pageSize });
+      if (cursor) params.set('cursor', cursor);
+      const response = await this.sendRequest(`/api/delegators/steem?${params}`, 'GET');
+      if (!response.success) {
+        return response;
+      }
+      if (merged === null) {
+        merged = { ...response.data, delegators: [] };
+      }
+      merged.delegators.push(...response.data.delegators);
+      cursor = response.data.next_cursor;
+    } while (cursor);
+    merged.next_cursor = null;
+    return { success: true, data: merged };
+  }
+
+  /**
+   * Ottiene le modifiche ai delegatori successive a un numero di sequenza
+   * @param {number} since - Ultimo numero di sequenza già applicato
+   * @returns {Promise} Modifiche (new, updated, removed) e ultimo numero di sequenza
+   */
+  async getDelegatorChanges(since = 0) {
+    return await this.sendRequest(`/api/delegators/changes?since=${encodeURIComponent(since)}`, 'GET');
   }
 }
 